@@ -3,9 +3,16 @@ from __future__ import annotations
 
 import logging
 import asyncio
+import json
+import time
 import aiohttp
 import async_timeout
-from datetime import timedelta
+from collections.abc import AsyncIterator, Mapping, Sequence
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from types import MappingProxyType
+from typing import NamedTuple
+from urllib.parse import urlencode
 
 # Version information
 __version__ = "2.1.1"
@@ -15,37 +22,140 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CONF_USERNAME,
     CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
     Platform,
 )
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    callback,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_create_clientsession
 from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
 
 from .const import (
     DOMAIN,
-    MUTATION_SET_VEHICLE_SOC,
+    DEFAULT_SCAN_INTERVAL,
     ATTR_VEHICLE_ID,
     ATTR_HOME_ID,
     ATTR_BATTERY_LEVEL,
+    ATTR_TIMEOUT,
+    ATTR_BACKGROUND,
+    ATTR_DURATION,
+    ATTR_BEFORE,
+    SERVICE_SET_VEHICLE_SOC,
+    SERVICE_FIND_CHEAPEST_WINDOW,
+)
+from .coordinator import TibberHomeDataUpdateCoordinator
+from .operations import (
+    GET_PRICE_INFO,
+    INTROSPECT_SCHEMA,
+    SET_VEHICLE_SETTINGS,
+    TYPENAME,
+    Operation,
+    vehicle_soc_variables,
 )
+from .prices import PriceCurve, parse_price_info
+from .schema import SCHEMA_MAX_AGE, SchemaSnapshot, SchemaStore
+from .writer import SocWriteQueue
+from .tracing import (
+    NULL_TRACE,
+    SPAN_JSON_DECODE,
+    SPAN_REQUEST,
+    SPAN_TOKEN_WAIT,
+    NullTrace,
+    RequestTrace,
+    TraceHook,
+    aiohttp_trace_config,
+    default_hook,
+)
+from .transport import AiohttpTransport, Transport
 
 __all__ = ["TibberGraphAPI"]
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = []  # No platforms, service-only integration
+PLATFORMS: list[Platform] = [Platform.SENSOR]
+
+
+class TibberRuntimeData(NamedTuple):
+    """Objects of one config entry, kept in ``hass.data[DOMAIN][entry_id]``."""
+
+    api: TibberGraphAPI
+    coordinator: TibberHomeDataUpdateCoordinator
+    writer: SocWriteQueue
+
+# Per-step limits, further capped by the caller's deadline when one is given
+ENDPOINT_TEST_TIMEOUT = 5
+LOGIN_TIMEOUT = 15
+GQL_TIMEOUT = 15
+
+DEFAULT_BASE_URL = "https://app.tibber.com"
+
+# Hedged login: start the next candidate whenever the running ones have not
+# produced a token within the delay, with at most this many in flight. The
+# first hedge waits longer, so a healthy login usually posts only once, but
+# far less than LOGIN_TIMEOUT, so a hanging endpoint is not waited out.
+FIRST_HEDGE_DELAY = 3.0
+HEDGE_DELAY = 1.0
+MAX_CONCURRENT_LOGINS = 3
+
+# Headers the app sends with every request. Header sets are read-only and
+# replaced as a whole, never updated in place, so a request in flight
+# keeps the set it started with.
+BASE_HEADERS: Mapping[str, str] = MappingProxyType({
+    "Accept-Language": "en",
+    "x-tibber-new-ui": "true",
+    "User-Agent": "Tibber/25.20.0 (versionCode: 2520004Dalvik/2.1.0 (Linux; U; Android 10; Android SDK built for x86_64 Build/QSR1.211112.011))",
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Accept": "application/json, text/plain, */*",
+    "Origin": "https://app.tibber.com",
+    "Referer": "https://app.tibber.com/",
+})
+JSON_HEADERS: Mapping[str, str] = MappingProxyType({
+    **BASE_HEADERS, "Content-Type": "application/json"
+})
+
+
+def _deadline_from_timeout(timeout: float | None) -> float | None:
+    """Convert a relative timeout in seconds into an absolute monotonic deadline."""
+    if timeout is None:
+        return None
+    return time.monotonic() + timeout
+
+
+def _budget(deadline: float | None, limit: float) -> float:
+    """Return the time a step may take, capped by what is left of the deadline."""
+    if deadline is None:
+        return limit
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise asyncio.TimeoutError
+    return min(limit, remaining)
 
-# Service-only integration, no config schema needed
+# Config entries only, no config schema needed
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Tibber GraphAPI from a config entry."""
-    session = async_get_clientsession(hass)
+    # Own session so aiohttp reports connection queueing and setup as spans
+    # once tracing is switched on; the signals are no-ops otherwise
+    session = async_create_clientsession(hass, trace_configs=[aiohttp_trace_config()])
+    entry.async_on_unload(session.close)
     
     api = TibberGraphAPI(
         session,
         entry.data[CONF_USERNAME],
         entry.data[CONF_PASSWORD],
+        schema_store=SchemaStore(hass),
     )
+
+    # A recent cached schema lets the login skip the endpoint probe
+    await api.async_load_schema_cache()
     
     try:
         await api.authenticate()
@@ -53,88 +163,213 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         _LOGGER.error("Failed to authenticate with Tibber: %s", err)
         return False
 
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = api
+    await api.async_refresh_schema()
 
-    # Register service
-    async def set_vehicle_soc(call: ServiceCall) -> None:
-        """Set vehicle state of charge."""
+    # One coordinator per entry, polling the vehicles of every home at once
+    coordinator = TibberHomeDataUpdateCoordinator(
+        hass,
+        api,
+        timedelta(seconds=entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)),
+    )
+    # Not async_config_entry_first_refresh: the service must keep working
+    # when the snapshot fails, the sensors follow once data arrives
+    await coordinator.async_refresh()
+
+    writer = SocWriteQueue(api, on_written=partial(_apply_soc, hass))
+    writer.start(
+        lambda coro: hass.async_create_background_task(coro, f"{DOMAIN} SoC writes {entry.entry_id}")
+    )
+    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = TibberRuntimeData(api, coordinator, writer)
+
+    if not hass.services.has_service(DOMAIN, SERVICE_SET_VEHICLE_SOC):
+        _async_register_services(hass)
+
+    # Set up periodic token refresh (every 18 hours)
+    async def refresh_token():
+        """Periodically refresh the authentication token."""
+        try:
+            await api.authenticate()
+            _LOGGER.debug("Token refreshed successfully")
+            await api.async_refresh_schema()
+        except Exception as err:
+            _LOGGER.error("Failed to refresh token: %s", err)
+
+    # Schedule token refresh every 18 hours (64800 seconds)
+    entry.async_on_unload(async_track_time_interval(
+        hass,
+        refresh_token, 
+        timedelta(hours=18)
+    ))
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    return True
+
+async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Unload a config entry."""
+    if not await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        return False
+    runtime: TibberRuntimeData = hass.data[DOMAIN].pop(entry.entry_id)
+    await runtime.writer.async_stop()
+    if not hass.data[DOMAIN]:
+        # The handlers need a loaded entry to send anything
+        hass.services.async_remove(DOMAIN, SERVICE_SET_VEHICLE_SOC)
+        hass.services.async_remove(DOMAIN, SERVICE_FIND_CHEAPEST_WINDOW)
+    return True
+
+
+@callback
+def _apply_soc(hass: HomeAssistant, home_id: str, vehicle_id: str, battery_level: int) -> None:
+    """Show an acknowledged level on the sensors of that home right away."""
+    # Any entry may poll the home, not only the one that sent the write
+    for runtime in hass.data.get(DOMAIN, {}).values():
+        runtime.coordinator.async_apply_battery_level(home_id, vehicle_id, battery_level)
+
+
+def _runtime_for_home(hass: HomeAssistant, home_id: str) -> TibberRuntimeData:
+    """Return the loaded entry that polls the home, else the first loaded entry."""
+    runtimes: list[TibberRuntimeData] = list(hass.data.get(DOMAIN, {}).values())
+    if not runtimes:
+        raise HomeAssistantError("No Tibber account is loaded")
+    for runtime in runtimes:
+        snapshot = runtime.coordinator.data
+        if snapshot and any(state.home_id == home_id for state in snapshot.devices.values()):
+            return runtime
+    return runtimes[0]
+
+
+def _async_register_services(hass: HomeAssistant) -> None:
+    """Register the services once for all entries.
+
+    The handlers look up the entry at call time, so they never use the
+    client or write queue of an entry that has been unloaded.
+    """
+    async def set_vehicle_soc(call: ServiceCall) -> ServiceResponse:
+        """Set vehicle state of charge.
+
+        With ``background`` the write is queued and the call returns at
+        once. When the caller asks for a response, the call waits and
+        reports success, latency and the server result instead of only
+        logging them.
+        """
         _LOGGER.debug("Service called with data: %s", call.data)
         
         vehicle_id = call.data.get(ATTR_VEHICLE_ID) or call.data.get("vehicle_id")
         home_id = call.data.get(ATTR_HOME_ID) or call.data.get("home_id")
         battery_level = call.data.get(ATTR_BATTERY_LEVEL) or call.data.get("battery_level")
+        timeout = call.data.get(ATTR_TIMEOUT)
+        background = bool(call.data.get(ATTR_BACKGROUND))
         
         _LOGGER.debug("Parsed parameters - vehicle_id: %s, home_id: %s, battery_level: %s", 
                      vehicle_id, home_id, battery_level)
+
+        if background and call.return_response:
+            raise HomeAssistantError("A background SoC update cannot return a response")
         
         # Validate required parameters
+        error = None
         if not vehicle_id:
-            _LOGGER.error("Missing required parameter: vehicle_id")
-            return
-        if not home_id:
-            _LOGGER.error("Missing required parameter: home_id")
-            return
-        if battery_level is None:
-            _LOGGER.error("Missing required parameter: battery_level")
-            return
+            error = "Missing required parameter: vehicle_id"
+        elif not home_id:
+            error = "Missing required parameter: home_id"
+        elif battery_level is None:
+            error = "Missing required parameter: battery_level"
+        if error:
+            if call.return_response:
+                return {"success": False, "error": error}
+            _LOGGER.error(error)
+            return None
+
+        runtime = _runtime_for_home(hass, home_id)
+        if background:
+            try:
+                runtime.writer.submit(vehicle_id, home_id, battery_level, timeout)
+            except (ValueError, RuntimeError) as err:
+                _LOGGER.error("Failed to queue vehicle %s SoC: %s", vehicle_id, err)
+            return None
 
+        started = time.monotonic()
+        variables = vehicle_soc_variables(vehicle_id, home_id, battery_level)
         try:
-            # Validate battery level is within valid range
-            if not isinstance(battery_level, (int, float)) or battery_level < 0 or battery_level > 100:
-                _LOGGER.error("Invalid battery level: %s. Must be between 0 and 100", battery_level)
-                return
-                
-            await api.execute_gql(
-                MUTATION_SET_VEHICLE_SOC,
-                {
-                    "vehicleId": vehicle_id,
-                    "homeId": home_id,
-                    "settings": [
-                        {
-                            "key": "offline.vehicle.batteryLevel",
-                            "value": int(battery_level)  # Ensure it's an integer
-                        }
-                    ]
-                }
-            )
-            _LOGGER.info(
-                "Successfully set vehicle %s SoC to %s%%",
-                vehicle_id,
-                battery_level
-            )
+            result = await runtime.api.execute_gql(SET_VEHICLE_SETTINGS, variables, timeout=timeout)
         except Exception as err:
             _LOGGER.error(
                 "Failed to set vehicle %s SoC: %s",
                 vehicle_id,
                 err
             )
+            if call.return_response:
+                return {
+                    "success": False,
+                    "latency_ms": round((time.monotonic() - started) * 1000),
+                    "error": str(err),
+                }
+            return None
 
-    hass.services.async_register(DOMAIN, "set_vehicle_soc", set_vehicle_soc)
+        _LOGGER.info(
+            "Successfully set vehicle %s SoC to %s%%",
+            vehicle_id,
+            battery_level
+        )
+        _apply_soc(hass, home_id, vehicle_id, variables["settings"][0]["value"])
+        if call.return_response:
+            return {
+                "success": True,
+                "latency_ms": round((time.monotonic() - started) * 1000),
+                "result": result,
+            }
+        return None
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_VEHICLE_SOC,
+        set_vehicle_soc,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+
+    async def find_cheapest_window(call: ServiceCall) -> ServiceResponse:
+        """Find the cheapest contiguous charging window from cached prices."""
+        home_id = call.data.get(ATTR_HOME_ID)
+        duration = call.data.get(ATTR_DURATION)
+        before = call.data.get(ATTR_BEFORE)
+
+        if not home_id:
+            raise HomeAssistantError("Missing required parameter: home_id")
+        if not isinstance(duration, (int, float)) or duration <= 0:
+            raise HomeAssistantError(f"Invalid duration: {duration}. Must be a positive number of hours")
+
+        if before is not None and not isinstance(before, datetime):
+            before = dt_util.parse_datetime(str(before))
+            if before is None:
+                raise HomeAssistantError(f"Invalid datetime for before: {call.data.get(ATTR_BEFORE)}")
+        if before is not None and before.tzinfo is None:
+            before = before.replace(tzinfo=dt_util.DEFAULT_TIME_ZONE)
 
-    # Set up periodic token refresh (every 18 hours)
-    async def refresh_token():
-        """Periodically refresh the authentication token."""
         try:
-            await api.authenticate()
-            _LOGGER.debug("Token refreshed successfully")
+            runtime = _runtime_for_home(hass, home_id)
+            curve = await runtime.api.async_get_price_curve(home_id, timeout=call.data.get(ATTR_TIMEOUT))
         except Exception as err:
-            _LOGGER.error("Failed to refresh token: %s", err)
+            raise HomeAssistantError(f"Failed to get prices for home {home_id}: {err}") from err
 
-    # Schedule token refresh every 18 hours (64800 seconds)
-    async_track_time_interval(
-        hass,
-        refresh_token, 
-        timedelta(hours=18)
+        window = curve.cheapest_window(
+            timedelta(hours=duration), before=before, after=dt_util.utcnow()
+        )
+        if window is None:
+            return {"found": False}
+        return {
+            "found": True,
+            "start": window.start.isoformat(),
+            "end": window.end.isoformat(),
+            "average_price": round(window.average, 4),
+            "total_price": round(window.total, 4),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_CHEAPEST_WINDOW,
+        find_cheapest_window,
+        supports_response=SupportsResponse.ONLY,
     )
 
-    # No platforms to setup for service-only integration
-    return True
-
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
-    # Service-only integration, just clean up data
-    hass.data[DOMAIN].pop(entry.entry_id)
-    return True
 
 class TibberGraphAPI:
     """Handle all communication with the Tibber GraphAPI."""
@@ -144,59 +379,91 @@ class TibberGraphAPI:
         session: aiohttp.ClientSession,
         username: str,
         password: str,
+        hedged_login: bool = True,
+        hedge_delay: float = HEDGE_DELAY,
+        first_hedge_delay: float = FIRST_HEDGE_DELAY,
+        max_concurrent_logins: int = MAX_CONCURRENT_LOGINS,
+        schema_store: Store | None = None,
+        base_url: str = DEFAULT_BASE_URL,
+        alternative_login_urls: list[str] | None = None,
+        trace_hook: TraceHook | None = None,
+        transport: Transport | None = None,
     ) -> None:
-        """Initialize the API client."""
-        self._session = session
+        """Initialize the API client.
+
+        ``base_url`` and ``alternative_login_urls`` only need changing to
+        talk to a stand-in server such as the one in ``simulator``.
+        Requests go through ``session`` unless another ``transport`` is
+        given, in which case ``session`` may be None.
+        """
+        self._transport = transport if transport is not None else AiohttpTransport(session)
         self._username = username
         self._password = password
+        self._hedged_login = hedged_login
+        # Receives the spans of every GraphQL call, can be swapped at runtime
+        self.trace_hook = trace_hook
+        self._hedge_delay = hedge_delay
+        self._first_hedge_delay = first_hedge_delay
+        self._max_concurrent_logins = max(1, max_concurrent_logins)
+        # (login URL, method number) that last produced a token, tried first
+        self._preferred_login: tuple[str, int] | None = None
+        # Login in progress, shared by every caller that needs a token
+        self._login_task: asyncio.Task | None = None
+        # Day-ahead prices per home, refetched only when stale
+        self._price_curves: dict[str, PriceCurve] = {}
+        self._price_locks: dict[str, asyncio.Lock] = {}
+        # Introspected schema, replaces the endpoint probe while it is fresh
+        self._schema_store = schema_store
+        self._schema: SchemaSnapshot | None = None
+        self._schema_failed_at: datetime | None = None
         self._token = None
         self._token_expires_at = None
-        self._headers = {
-            "Accept-Language": "en",
-            "x-tibber-new-ui": "true",
-            "User-Agent": "Tibber/25.20.0 (versionCode: 2520004Dalvik/2.1.0 (Linux; U; Android 10; Android SDK built for x86_64 Build/QSR1.211112.011))",
-            "Content-Type": "application/x-www-form-urlencoded",
-            "Accept": "application/json, text/plain, */*",
-            "Origin": "https://app.tibber.com",
-            "Referer": "https://app.tibber.com/",
-        }
-        self._endpoint = "https://app.tibber.com/v4/gql"
-        self._login_url = "https://app.tibber.com/login.credentials"
+        # Headers of GraphQL requests, replaced whenever a new token arrives
+        self._gql_headers: Mapping[str, str] = JSON_HEADERS
+        # Schema snapshots are tied to the app version we pretend to be
+        self._client = BASE_HEADERS["User-Agent"]
+        base_url = base_url.rstrip("/")
+        self._primary_endpoint = f"{base_url}/v4/gql"
+        self._endpoint = self._primary_endpoint
+        self._login_url = f"{base_url}/login.credentials"
         
         # Alternative endpoints to try if primary ones fail
         # Note: Only use the primary GraphQL endpoint as per reverse engineering
         self._alternative_endpoints = [
-            "https://app.tibber.com/v4/gql",  # Primary endpoint only
-        ]
-        self._alternative_login_urls = [
-            "https://app.tibber.com/login.credentials",
-            "https://api.tibber.com/v1-beta/login",
-            "https://api.tibber.com/v1/login",
-            "https://app.tibber.com/login",
-            "https://api.tibber.com/login",
+            self._primary_endpoint,  # Primary endpoint only
         ]
+        if alternative_login_urls is None:
+            alternative_login_urls = [
+                f"{base_url}/login.credentials",
+                "https://api.tibber.com/v1-beta/login",
+                "https://api.tibber.com/v1/login",
+                f"{base_url}/login",
+                "https://api.tibber.com/login",
+            ]
+        self._alternative_login_urls = alternative_login_urls
 
-    async def _test_endpoint(self, url: str) -> bool:
+    async def _test_endpoint(self, url: str, deadline: float | None = None) -> bool:
         """Test if an endpoint is accessible."""
         try:
-            async with async_timeout.timeout(5):
+            async with async_timeout.timeout(_budget(deadline, ENDPOINT_TEST_TIMEOUT)):
                 # For GraphQL endpoints, try a simple POST request
                 if "gql" in url:
-                    response = await self._session.post(
-                        url, 
-                        json={"query": "query { __typename }"},
-                        headers={**self._headers, "Content-Type": "application/json"}
+                    response = await self._transport.request(
+                        "POST",
+                        url,
+                        JSON_HEADERS,
+                        json.dumps({"query": TYPENAME.document}).encode(),
                     )
                     # Accept 200 (success) or 401 (auth required) as valid responses
                     return response.status in [200, 401]
                 else:
                     # For login endpoints, try GET
-                    response = await self._session.get(url, headers=self._headers)
+                    response = await self._transport.request("GET", url, BASE_HEADERS)
                     return response.status in [200, 404, 405]  # 404/405 are OK, means endpoint exists but method wrong
         except Exception:
             return False
 
-    async def _find_working_endpoints(self) -> tuple[str, str]:
+    async def _find_working_endpoints(self, deadline: float | None = None) -> tuple[str, str]:
         """Find working login and GraphQL endpoints."""
         _LOGGER.debug("Testing endpoint accessibility...")
         
@@ -208,16 +475,20 @@ class TibberGraphAPI:
         _LOGGER.debug("Using primary GraphQL endpoint: %s", endpoint)
         
         # Test if the primary GraphQL endpoint is accessible
-        if await self._test_endpoint(endpoint):
+        if self._schema is not None and self._schema.is_fresh(datetime.now(timezone.utc), self._client):
+            _LOGGER.debug("Recent schema snapshot available, skipping endpoint test")
+        elif await self._test_endpoint(endpoint, deadline):
             _LOGGER.debug("Primary GraphQL endpoint is accessible")
         else:
             _LOGGER.debug("Primary GraphQL endpoint test failed, but will use it anyway")
             
         return login_url, endpoint
 
-    def _update_headers_for_gql(self, token: str) -> None:
-        """Update headers for GraphQL requests."""
-        self._headers.update({
+    @staticmethod
+    def _gql_headers_for(token: str) -> Mapping[str, str]:
+        """Return the headers for GraphQL requests made with a token."""
+        return MappingProxyType({
+            **BASE_HEADERS,
             "Content-Type": "application/json",
             "Authorization": f"Bearer {token}",
             "Accept": "application/graphql-response+json, application/json",
@@ -259,56 +530,173 @@ class TibberGraphAPI:
             _LOGGER.warning("Failed to validate token scopes: %s", e)
             return True  # Don't fail if we can't validate
 
-    async def _try_authentication_methods(self, login_url: str) -> dict:
-        """Try different authentication methods for a given URL."""
-        methods = [
+    def _login_methods(self) -> list[dict]:
+        """Return the request variants used to post credentials."""
+        return [
             # Method 1: Form data (original)
             {
-                "data": f"email={self._username}&password={self._password}",
-                "headers": self._headers.copy()
+                "body": f"email={self._username}&password={self._password}".encode(),
+                "headers": BASE_HEADERS
             },
             # Method 2: JSON payload
             {
-                "json": {"email": self._username, "password": self._password},
-                "headers": {**self._headers, "Content-Type": "application/json"}
+                "body": json.dumps({"email": self._username, "password": self._password}).encode(),
+                "headers": JSON_HEADERS
             },
             # Method 3: Different form format
             {
-                "data": {"email": self._username, "password": self._password},
-                "headers": self._headers.copy()
+                "body": urlencode({"email": self._username, "password": self._password}).encode(),
+                "headers": BASE_HEADERS
             }
         ]
-        
-        for i, method in enumerate(methods, 1):
-            _LOGGER.debug("Trying authentication method %d for %s", i, login_url)
-            try:
-                async with async_timeout.timeout(15):
-                    response = await self._session.post(
-                        login_url,
-                        **method
-                    )
-                    
-                    _LOGGER.debug("Method %d response status: %s", i, response.status)
+
+    async def _try_login(
+        self, login_url: str, i: int, method: dict, deadline: float | None = None
+    ) -> dict | None:
+        """Post credentials once with the given method, return the token data or None."""
+        _LOGGER.debug("Trying authentication method %d for %s", i, login_url)
+        # Outside the try so an exhausted deadline ends the whole login
+        budget = _budget(deadline, LOGIN_TIMEOUT)
+        try:
+            async with async_timeout.timeout(budget):
+                response = await self._transport.request("POST", login_url, **method)
+                
+                _LOGGER.debug("Method %d response status: %s", i, response.status)
+                
+                if response.status == 200:
+                    try:
+                        data = json.loads(response.body)
+                        if "token" in data:
+                            _LOGGER.info("Authentication method %d successful!", i)
+                            return data
+                    except Exception as json_err:
+                        _LOGGER.debug("Method %d failed to parse JSON: %s", i, json_err)
+                elif _LOGGER.isEnabledFor(logging.DEBUG):
+                    response_text = response.body.decode("utf-8", errors="replace")
+                    _LOGGER.debug("Method %d failed with status %s: %s", i, response.status, response_text[:200])
                     
-                    if response.status == 200:
-                        try:
-                            data = await response.json()
-                            if "token" in data:
-                                _LOGGER.info("Authentication method %d successful!", i)
-                                return data
-                        except Exception as json_err:
-                            _LOGGER.debug("Method %d failed to parse JSON: %s", i, json_err)
-                    else:
-                        response_text = await response.text()
-                        _LOGGER.debug("Method %d failed with status %s: %s", i, response.status, response_text[:200])
-                        
-            except Exception as e:
-                _LOGGER.debug("Method %d failed with exception: %s", i, e)
+        except asyncio.TimeoutError:
+            if deadline is not None and time.monotonic() >= deadline:
+                raise
+            _LOGGER.debug("Method %d timed out after %s seconds", i, LOGIN_TIMEOUT)
+        except Exception as e:
+            _LOGGER.debug("Method %d failed with exception: %s", i, e)
+
+        return None
+
+    async def _try_authentication_methods(
+        self, login_url: str, deadline: float | None = None
+    ) -> dict:
+        """Try different authentication methods for a given URL."""
+        for i, method in enumerate(self._login_methods(), 1):
+            data = await self._try_login(login_url, i, method, deadline)
+            if data:
+                return data
                 
         return None
 
-    async def _retry_with_delay(self, func, max_retries: int = 3, delay: float = 2.0):
-        """Retry a function with exponential backoff."""
+    def _login_candidates(self) -> list[tuple[str, int]]:
+        """Return every (login URL, method number) pair, most promising first."""
+        urls = [self._login_url] + [
+            url for url in self._alternative_login_urls if url != self._login_url
+        ]
+        method_count = len(self._login_methods())
+        candidates = [
+            (url, i) for url in urls for i in range(1, method_count + 1)
+        ]
+        if self._preferred_login in candidates:
+            candidates.remove(self._preferred_login)
+            candidates.insert(0, self._preferred_login)
+        return candidates
+
+    async def _hedged_authentication(
+        self, deadline: float | None = None
+    ) -> tuple[str, int, dict] | None:
+        """Race login candidates and return the first one that yields a token.
+
+        The best-ranked candidate starts alone. The next one is started
+        when a running attempt fails, or when ``first_hedge_delay`` and
+        after that every ``hedge_delay`` passes without a token, with at
+        most ``max_concurrent_logins`` in flight. The remaining attempts
+        are cancelled as soon as one succeeds.
+        """
+        methods = self._login_methods()
+        candidates = iter(self._login_candidates())
+        exhausted = False
+        hedging = False
+        pending: dict[asyncio.Task, tuple[str, int]] = {}
+        to_start = 1
+
+        try:
+            while True:
+                # One new attempt per elapsed hedge delay, plus a replacement
+                # for every attempt that just failed
+                for _ in range(to_start):
+                    if exhausted or len(pending) >= self._max_concurrent_logins:
+                        break
+                    candidate = next(candidates, None)
+                    if candidate is None:
+                        exhausted = True
+                        break
+                    url, i = candidate
+                    task = asyncio.create_task(
+                        self._try_login(url, i, methods[i - 1], deadline)
+                    )
+                    pending[task] = candidate
+
+                if not pending:
+                    return None
+
+                # Wake up for the next hedge only if there is one to start
+                can_hedge = not exhausted and len(pending) < self._max_concurrent_logins
+                delay = self._hedge_delay if hedging else self._first_hedge_delay
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=delay if can_hedge else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                to_start = len(done) or 1
+                for task in done:
+                    url, i = pending.pop(task)
+                    data = task.result()
+                    if data and "token" in data:
+                        return url, i, data
+                hedging = True
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def _apply_token(self, data: dict) -> None:
+        """Store a freshly issued token and switch the headers to GraphQL."""
+        # Validate token scopes
+        if not self._validate_token_scopes(data['token']):
+            _LOGGER.warning("Token scopes validation failed, but continuing...")
+        
+        # New header set for subsequent GraphQL requests
+        self._gql_headers = self._gql_headers_for(data['token'])
+        self._token = data["token"]
+        
+        # Ensure we're using the correct GraphQL endpoint
+        self._endpoint = self._primary_endpoint
+        
+        # Set token expiry (JWT tokens typically expire in 20 hours)
+        # We'll refresh 1 hour before expiry to be safe
+        self._token_expires_at = time.time() + (18 * 3600)  # 18 hours from now
+        
+        _LOGGER.info("Successfully authenticated with Tibber, token expires at: %s", 
+                   self._token_expires_at)
+        _LOGGER.info("Using GraphQL endpoint: %s", self._endpoint)
+
+    async def _retry_with_delay(
+        self,
+        func,
+        max_retries: int = 3,
+        delay: float = 2.0,
+        deadline: float | None = None,
+    ):
+        """Retry a function with exponential backoff, stopping at the deadline."""
         for attempt in range(max_retries):
             try:
                 return await func()
@@ -317,50 +705,79 @@ class TibberGraphAPI:
                     raise e
                 
                 wait_time = delay * (2 ** attempt)  # Exponential backoff
+                if deadline is not None and time.monotonic() + wait_time >= deadline:
+                    # No budget left for another attempt after the backoff
+                    raise e
                 _LOGGER.debug("Attempt %d failed, retrying in %.1f seconds: %s", 
                             attempt + 1, wait_time, e)
                 await asyncio.sleep(wait_time)
 
-    async def authenticate(self) -> None:
-        """Authenticate with Tibber and get JWT token."""
+    async def authenticate(
+        self, timeout: float | None = None, *, deadline: float | None = None
+    ) -> None:
+        """Authenticate with Tibber and get JWT token.
+
+        Either a relative ``timeout`` in seconds or an absolute monotonic
+        ``deadline`` bounds the whole login including retries.
+
+        Only one login runs per client: a call made while another is in
+        progress waits for that login, within its own deadline, instead of
+        posting the credentials again.
+        """
+        if deadline is None:
+            deadline = _deadline_from_timeout(timeout)
+
+        if self._login_task is None:
+            self._login_task = asyncio.create_task(self._authenticate(deadline))
+            self._login_task.add_done_callback(self._login_finished)
+        remaining = None if deadline is None else deadline - time.monotonic()
+        async with async_timeout.timeout(remaining):
+            # Shielded, a caller running out of time must not end the login for the others
+            await asyncio.shield(self._login_task)
+
+    def _login_finished(self, task: asyncio.Task) -> None:
+        """Allow the next login once the shared one is over."""
+        self._login_task = None
+        if not task.cancelled():
+            # Mark the error as retrieved, the waiters may all have given up
+            task.exception()
+
+    async def _authenticate(self, deadline: float | None) -> None:
+        """Run one login, see authenticate."""
+
         async def _auth_attempt():
             # Try to find working endpoints first
-            login_url, endpoint = await self._find_working_endpoints()
+            login_url, endpoint = await self._find_working_endpoints(deadline)
             self._login_url = login_url
             self._endpoint = endpoint
             
             _LOGGER.debug("Attempting to authenticate with Tibber at %s", self._login_url)
-            _LOGGER.debug("Using headers: %s", {k: v for k, v in self._headers.items() if k != "Authorization"})
+            _LOGGER.debug("Using headers: %s", BASE_HEADERS)
+
+            if self._hedged_login:
+                result = await self._hedged_authentication(deadline)
+                if result:
+                    url, i, data = result
+                    if url != self._login_url:
+                        _LOGGER.info("Successfully authenticated with alternative endpoint: %s", url)
+                    self._login_url = url
+                    self._preferred_login = (url, i)
+                    self._apply_token(data)
+                    return
+                raise Exception("Authentication failed: All endpoints returned HTML error pages or failed")
             
             # Try different authentication methods
-            data = await self._try_authentication_methods(self._login_url)
+            data = await self._try_authentication_methods(self._login_url, deadline)
             
             if data:
-                _LOGGER.debug("Authentication response data keys: %s", list(data.keys()) if isinstance(data, dict) else "Not a dict")
+                if _LOGGER.isEnabledFor(logging.DEBUG):
+                    _LOGGER.debug("Authentication response data keys: %s", list(data.keys()) if isinstance(data, dict) else "Not a dict")
                 
                 if "token" not in data:
                     _LOGGER.error("No token in authentication response: %s", data)
                     raise Exception("No token received from authentication")
                 
-                # Validate token scopes
-                if not self._validate_token_scopes(data['token']):
-                    _LOGGER.warning("Token scopes validation failed, but continuing...")
-                
-                # Update headers for subsequent GraphQL requests
-                self._update_headers_for_gql(data['token'])
-                self._token = data["token"]
-                
-                # Ensure we're using the correct GraphQL endpoint
-                self._endpoint = "https://app.tibber.com/v4/gql"
-                
-                # Set token expiry (JWT tokens typically expire in 20 hours)
-                # We'll refresh 1 hour before expiry to be safe
-                import time
-                self._token_expires_at = time.time() + (18 * 3600)  # 18 hours from now
-                
-                _LOGGER.info("Successfully authenticated with Tibber, token expires at: %s", 
-                           self._token_expires_at)
-                _LOGGER.info("Using GraphQL endpoint: %s", self._endpoint)
+                self._apply_token(data)
                 return
             
             # If primary endpoint failed, try alternative endpoints
@@ -369,109 +786,330 @@ class TibberGraphAPI:
             for alt_login_url in self._alternative_login_urls:
                 if alt_login_url != self._login_url:
                     _LOGGER.info("Trying alternative login endpoint: %s", alt_login_url)
-                    data = await self._try_authentication_methods(alt_login_url)
+                    data = await self._try_authentication_methods(alt_login_url, deadline)
                     
                     if data and "token" in data:
                         _LOGGER.info("Successfully authenticated with alternative endpoint: %s", alt_login_url)
                         self._login_url = alt_login_url
-                        
-                        # Validate token scopes
-                        if not self._validate_token_scopes(data['token']):
-                            _LOGGER.warning("Alternative endpoint token scopes validation failed, but continuing...")
-                        
-                        # Update headers for subsequent GraphQL requests
-                        self._update_headers_for_gql(data['token'])
-                        self._token = data["token"]
-                        
-                        # Ensure we're using the correct GraphQL endpoint
-                        self._endpoint = "https://app.tibber.com/v4/gql"
-                        
-                        # Set token expiry
-                        import time
-                        self._token_expires_at = time.time() + (18 * 3600)
-                        _LOGGER.info("Using GraphQL endpoint: %s", self._endpoint)
+                        self._apply_token(data)
                         return
             
             # If all endpoints failed
             raise Exception("Authentication failed: All endpoints returned HTML error pages or failed")
         
         # Use retry logic with exponential backoff
-        await self._retry_with_delay(_auth_attempt, max_retries=3, delay=5.0)
+        await self._retry_with_delay(
+            _auth_attempt, max_retries=3, delay=5.0, deadline=deadline
+        )
 
-    async def execute_gql(self, query: str, variables: dict = None) -> dict:
-        """Execute a GraphQL query."""
-        import time
-        
-        # Check if token needs refresh (1 hour before expiry)
-        if not self._token or (self._token_expires_at and time.time() >= self._token_expires_at):
-            _LOGGER.debug("Token expired or missing, refreshing authentication")
-            await self.authenticate()
+    async def _post_gql(
+        self,
+        payload: dict,
+        deadline: float | None,
+        trace: RequestTrace | NullTrace = NULL_TRACE,
+    ) -> tuple[int, bytes]:
+        """Send one GraphQL request and read its body within the budget."""
+        body = json.dumps(payload).encode()
+        async with async_timeout.timeout(_budget(deadline, GQL_TIMEOUT)):
+            response = await self._transport.request(
+                "POST", self._endpoint, self._gql_headers, body, trace
+            )
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("GraphQL response status: %s", response.status)
+            _LOGGER.debug("Response headers: %s", dict(response.headers))
+        return response.status, response.body
+
+    async def execute_gql(
+        self,
+        query: str | Operation,
+        variables: dict = None,
+        timeout: float | None = None,
+        *,
+        deadline: float | None = None,
+    ) -> dict:
+        """Execute a GraphQL query.
+
+        ``timeout`` (seconds) or ``deadline`` (``time.monotonic()`` value)
+        bounds the whole call: token refresh, the 401 retry and every HTTP
+        request share the same budget and are cancelled when it runs out.
+
+        Registered operations are checked against their declared variable
+        types before anything is sent and go out in their minified form.
+        With a ``trace_hook`` set, or debug logging enabled for ``tracing``,
+        each phase of the call is reported as a span.
+        """
+        operation_name = "anonymous"
+        if isinstance(query, Operation):
+            query.validate(variables)
+            operation_name = query.name
+            query = query.document
+
+        if deadline is None:
+            deadline = _deadline_from_timeout(timeout)
 
-        # Ensure we're using the correct endpoint
-        if not self._endpoint or not self._endpoint.startswith("https://app.tibber.com/v4/gql"):
-            _LOGGER.warning("Using non-standard GraphQL endpoint: %s", self._endpoint)
-            _LOGGER.info("Forcing use of primary endpoint: https://app.tibber.com/v4/gql")
-            self._endpoint = "https://app.tibber.com/v4/gql"
+        trace = NULL_TRACE
+        hook = self.trace_hook or default_hook()
+        if hook is not None:
+            trace = RequestTrace(hook, {"graphql.operation": operation_name})
 
-        _LOGGER.debug("Executing GraphQL query to %s", self._endpoint)
-        _LOGGER.debug("Query: %s", query[:200] + "..." if len(query) > 200 else query)
-        _LOGGER.debug("Variables: %s", variables)
+        with trace.span(SPAN_REQUEST):
+            return await self._execute_gql(query, variables, deadline, trace)
 
+    async def _execute_gql(
+        self,
+        query: str,
+        variables: dict | None,
+        deadline: float | None,
+        trace: RequestTrace | NullTrace,
+    ) -> dict:
+        """Run a GraphQL request including token handling, see execute_gql."""
+        debug = _LOGGER.isEnabledFor(logging.DEBUG)
         try:
-            async with async_timeout.timeout(15):
-                response = await self._session.post(
-                    self._endpoint,
-                    json={"query": query, "variables": variables or {}},
-                    headers=self._headers,
-                )
-                
-                _LOGGER.debug("GraphQL response status: %s", response.status)
-                _LOGGER.debug("Response headers: %s", dict(response.headers))
-                
-                if response.status == 401:
-                    # Token expired, re-authenticate and retry once
-                    _LOGGER.debug("Received 401, refreshing token and retrying")
-                    await self.authenticate()
-                    response = await self._session.post(
-                        self._endpoint,
-                        json={"query": query, "variables": variables or {}},
-                        headers=self._headers,
-                    )
-                    _LOGGER.debug("Retry response status: %s", response.status)
-                
-                if response.status != 200:
-                    response_text = await response.text()
-                    _LOGGER.error("GraphQL query failed with status %s", response.status)
-                    _LOGGER.error("Response text: %s", response_text[:500])  # Limit log size
-                    
-                    # Check if it's an HTML error page
-                    if "<!DOCTYPE html>" in response_text or "<html" in response_text:
-                        raise Exception(f"Query failed: {response.status} - Received HTML error page (possibly endpoint changed or blocked)")
-                    else:
-                        raise Exception(f"Query failed: {response.status} - {response_text}")
+            # Check if token needs refresh (1 hour before expiry)
+            if not self._token or (self._token_expires_at and time.time() >= self._token_expires_at):
+                _LOGGER.debug("Token expired or missing, refreshing authentication")
+                with trace.span(SPAN_TOKEN_WAIT):
+                    await self.authenticate(deadline=deadline)
+
+            # Ensure we're using the correct endpoint
+            if not self._endpoint or not self._endpoint.startswith(self._primary_endpoint):
+                _LOGGER.warning("Using non-standard GraphQL endpoint: %s", self._endpoint)
+                _LOGGER.info("Forcing use of primary endpoint: %s", self._primary_endpoint)
+                self._endpoint = self._primary_endpoint
+
+            if debug:
+                _LOGGER.debug("Executing GraphQL query to %s", self._endpoint)
+                _LOGGER.debug("Query: %s", query[:200] + "..." if len(query) > 200 else query)
+                _LOGGER.debug("Variables: %s", variables)
+
+            payload = {"query": query, "variables": variables or {}}
+            sent_headers = self._gql_headers
+            status, body = await self._post_gql(payload, deadline, trace)
+
+            if status == 401:
+                # Token expired, re-authenticate and retry once
+                _LOGGER.debug("Received 401, refreshing token and retrying")
+                with trace.span(SPAN_TOKEN_WAIT):
+                    # Concurrent calls rejected with the same token log in only once
+                    if self._gql_headers is sent_headers:
+                        await self.authenticate(deadline=deadline)
+                status, body = await self._post_gql(payload, deadline, trace)
+                _LOGGER.debug("Retry response status: %s", status)
+
+            if trace is not NULL_TRACE:
+                trace.attributes["http.status_code"] = status
+
+            if status != 200:
+                response_text = body.decode("utf-8", errors="replace")
+                _LOGGER.error("GraphQL query failed with status %s", status)
+                _LOGGER.error("Response text: %s", response_text[:500])  # Limit log size
                 
-                try:
-                    data = await response.json()
-                    _LOGGER.debug("GraphQL response data keys: %s", list(data.keys()) if isinstance(data, dict) else "Not a dict")
-                    
-                    if "errors" in data:
-                        _LOGGER.error("GraphQL errors: %s", data["errors"])
-                        raise Exception(f"Query failed: {data['errors']}")
-                    
-                    if "data" not in data:
-                        _LOGGER.error("No data in GraphQL response: %s", data)
-                        raise Exception("No data in GraphQL response")
-                    
-                    return data["data"]
-                except Exception as json_err:
-                    response_text = await response.text()
-                    _LOGGER.error("Failed to parse GraphQL response as JSON: %s", json_err)
-                    _LOGGER.error("Response text: %s", response_text[:500])  # Limit log size
-                    raise Exception(f"Invalid JSON response: {json_err}")
+                # Check if it's an HTML error page
+                if "<!DOCTYPE html>" in response_text or "<html" in response_text:
+                    raise Exception(f"Query failed: {status} - Received HTML error page (possibly endpoint changed or blocked)")
+                else:
+                    raise Exception(f"Query failed: {status} - {response_text}")
+            
+            try:
+                with trace.span(SPAN_JSON_DECODE):
+                    data = json.loads(body)
+            except ValueError as json_err:
+                _LOGGER.error("Failed to parse GraphQL response as JSON: %s", json_err)
+                _LOGGER.error("Response text: %s", body[:500].decode("utf-8", errors="replace"))  # Limit log size
+                raise Exception(f"Invalid JSON response: {json_err}")
+
+            if debug:
+                _LOGGER.debug("GraphQL response data keys: %s", list(data.keys()) if isinstance(data, dict) else "Not a dict")
+            
+            if "errors" in data:
+                _LOGGER.error("GraphQL errors: %s", data["errors"])
+                raise Exception(f"Query failed: {data['errors']}")
+            
+            if "data" not in data:
+                _LOGGER.error("No data in GraphQL response: %s", data)
+                raise Exception("No data in GraphQL response")
+            
+            return data["data"]
                     
         except asyncio.TimeoutError as err:
-            _LOGGER.error("GraphQL query timed out after 15 seconds")
+            _LOGGER.error("GraphQL query ran out of time")
             raise Exception("GraphQL query timed out") from err
         except Exception as err:
             _LOGGER.exception("Failed to execute GraphQL query")
-            raise 
\ No newline at end of file
+            raise
+
+    async def iterate_connection(
+        self,
+        query: str | Operation,
+        path: Sequence[str],
+        variables: dict | None = None,
+        *,
+        cursor_variable: str = "after",
+        timeout: float | None = None,
+    ) -> AsyncIterator[dict]:
+        """Yield every node of a Relay-style connection, page by page.
+
+        ``path`` names the keys from the response data down to the
+        connection, which must select ``pageInfo { hasNextPage endCursor }``
+        and either ``edges { node { ... } }`` or ``nodes { ... }``. The query
+        must accept the cursor as ``$<cursor_variable>``.
+
+        The next page is requested as soon as the current one arrives, so
+        the fetch overlaps with the caller's work on the current page. At
+        most two pages are held in memory at any time. ``timeout`` applies
+        to each page separately.
+
+        A prefetch that is still running is cancelled when the generator
+        is closed. Python only closes an async generator on ``aclose()`` or
+        garbage collection, not on ``break``, so callers that may stop
+        early should wrap it in ``contextlib.aclosing()``::
+
+            async with aclosing(api.iterate_connection(query, path)) as nodes:
+                async for node in nodes:
+                    if done(node):
+                        break
+        """
+        variables = dict(variables or {})
+        cursor = variables.get(cursor_variable)
+        next_page: asyncio.Task | None = asyncio.create_task(
+            self.execute_gql(query, variables, timeout)
+        )
+
+        try:
+            while next_page is not None:
+                data = await next_page
+                next_page = None
+
+                connection = data
+                for key in path:
+                    connection = connection.get(key) if isinstance(connection, dict) else None
+                if not isinstance(connection, dict):
+                    raise Exception(f"No connection at '{'.'.join(path)}' in GraphQL response")
+
+                page_info = connection.get("pageInfo") or {}
+                end_cursor = page_info.get("endCursor")
+                if page_info.get("hasNextPage") and end_cursor:
+                    if end_cursor == cursor:
+                        raise Exception(f"Connection cursor did not advance past {cursor}")
+                    cursor = end_cursor
+                    # Prefetch while the caller consumes this page
+                    next_page = asyncio.create_task(
+                        self.execute_gql(
+                            query, {**variables, cursor_variable: cursor}, timeout
+                        )
+                    )
+
+                if "edges" in connection:
+                    for edge in connection["edges"] or []:
+                        yield edge["node"]
+                else:
+                    for node in connection.get("nodes") or []:
+                        yield node
+
+                # Drop the page before waiting on the next one
+                del data, connection
+        finally:
+            if next_page is not None:
+                next_page.cancel()
+                await asyncio.gather(next_page, return_exceptions=True)
+
+    async def async_get_price_curve(
+        self, home_id: str, timeout: float | None = None
+    ) -> PriceCurve:
+        """Return today's and tomorrow's prices for a home.
+
+        The curve is cached and only fetched again after the day boundary,
+        or every PRICE_RETRY_INTERVAL once tomorrow's prices are due but
+        not yet published. Concurrent callers share a single fetch.
+        """
+        lock = self._price_locks.setdefault(home_id, asyncio.Lock())
+        async with lock:
+            now = datetime.now(timezone.utc)
+            cached = self._price_curves.get(home_id)
+            if cached is not None and cached.is_fresh(now):
+                return cached
+
+            try:
+                data = await self.execute_gql(
+                    GET_PRICE_INFO, {"homeId": home_id}, timeout
+                )
+                home = (data.get("me") or {}).get("home") or {}
+                price_info = (home.get("currentSubscription") or {}).get("priceInfo")
+                if not price_info:
+                    raise Exception(f"No price information for home {home_id}")
+                curve = parse_price_info(price_info, now)
+            except Exception:
+                if cached is not None and cached.day == now.astimezone(cached.tz).date():
+                    # Still today's prices, just without tomorrow yet
+                    _LOGGER.warning("Failed to refresh prices for home %s, using cached curve", home_id)
+                    return cached
+                raise
+
+            _LOGGER.debug(
+                "Cached %d price slots for home %s until %s",
+                len(curve.prices), home_id, curve.end,
+            )
+            self._price_curves[home_id] = curve
+            return curve
+
+    def _report_schema_problems(self, snapshot: SchemaSnapshot) -> None:
+        """Warn about schema changes that break the integration."""
+        for problem in snapshot.problems():
+            _LOGGER.warning("Tibber API change detected: %s", problem)
+
+    async def async_load_schema_cache(self) -> SchemaSnapshot | None:
+        """Load the stored schema snapshot, if there is one."""
+        if self._schema is not None or self._schema_store is None:
+            return self._schema
+        try:
+            snapshot = SchemaSnapshot.from_dict(await self._schema_store.async_load())
+        except (HomeAssistantError, ValueError, KeyError, TypeError) as err:
+            _LOGGER.debug("Ignoring unreadable schema cache: %s", err)
+            return None
+        if snapshot is not None:
+            _LOGGER.debug(
+                "Loaded schema %s from %s", snapshot.fingerprint[:12], snapshot.fetched_at
+            )
+            self._schema = snapshot
+            self._report_schema_problems(snapshot)
+        return snapshot
+
+    async def async_refresh_schema(
+        self, timeout: float | None = None
+    ) -> SchemaSnapshot | None:
+        """Introspect the schema if the snapshot is missing or old.
+
+        The snapshot is refreshed at most every SCHEMA_MAX_AGE, or when the
+        client version changes, and saved to ``schema_store``. Any
+        deviation from the fields the integration uses is logged as a
+        warning when a changed schema is first seen.
+        """
+        await self.async_load_schema_cache()
+        now = datetime.now(timezone.utc)
+        if self._schema is not None and self._schema.is_fresh(now, self._client):
+            return self._schema
+        if self._schema_failed_at is not None and now - self._schema_failed_at < SCHEMA_MAX_AGE:
+            # Introspection is not available, keep probing instead
+            return self._schema
+
+        try:
+            data = await self.execute_gql(INTROSPECT_SCHEMA, timeout=timeout)
+            snapshot = SchemaSnapshot.from_introspection(data, now, self._client)
+        except Exception as err:
+            _LOGGER.debug("Schema introspection failed, keeping endpoint tests: %s", err)
+            self._schema_failed_at = now
+            return self._schema
+
+        previous = self._schema
+        self._schema = snapshot
+        self._schema_failed_at = None
+        if previous is None or previous.fingerprint != snapshot.fingerprint:
+            _LOGGER.debug("New schema snapshot %s", snapshot.fingerprint[:12])
+            self._report_schema_problems(snapshot)
+
+        if self._schema_store is not None:
+            try:
+                await self._schema_store.async_save(snapshot.as_dict())
+            except (HomeAssistantError, OSError) as err:
+                _LOGGER.warning("Failed to save schema cache: %s", err)
+        return snapshot
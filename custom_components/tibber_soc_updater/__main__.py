@@ -0,0 +1,294 @@
+"""Headless bulk SoC updates with latency reporting.
+
+Usage:
+
+    TIBBER_USERNAME=... TIBBER_PASSWORD=... \\
+        python -m custom_components.tibber_soc_updater updates.csv --concurrency 4
+
+The input is CSV with a header row, or JSONL with one object per line,
+holding ``vehicle_id``, ``home_id`` and ``battery_level``. All rows share
+one HTTP session and one token. Each update is printed with its latency,
+followed by aggregate statistics. ``--simulate`` runs against the local
+stand-in server instead of Tibber, for offline benchmarking. ``--trace``
+adds a breakdown of where the time went per request phase.
+``--transport in-process`` calls the stand-in directly without sockets,
+which leaves only the client's own overhead in the latencies, and
+``--transport http2`` multiplexes all updates over one connection.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import csv
+from collections import defaultdict
+from collections.abc import Mapping
+from dataclasses import dataclass
+import json
+import logging
+import math
+import os
+import statistics
+import sys
+import time
+from typing import Any
+
+import aiohttp
+
+from . import TibberGraphAPI
+from .const import ATTR_BATTERY_LEVEL, ATTR_HOME_ID, ATTR_VEHICLE_ID
+from .operations import SET_VEHICLE_SETTINGS, vehicle_soc_variables
+from .tracing import aiohttp_trace_config
+from .transport import HttpxTransport, InProcessTransport, Transport
+
+ENV_USERNAME = "TIBBER_USERNAME"
+ENV_PASSWORD = "TIBBER_PASSWORD"
+
+TRANSPORT_AIOHTTP = "aiohttp"
+TRANSPORT_HTTP2 = "http2"
+TRANSPORT_IN_PROCESS = "in-process"
+
+
+@dataclass
+class UpdateResult:
+    """Outcome of one row."""
+
+    row: int
+    vehicle_id: str
+    battery_level: Any
+    ok: bool
+    latency: float
+    error: str | None = None
+    # False for rows rejected locally before any request
+    sent: bool = True
+
+
+def read_rows(path: str) -> list[dict[str, Any]]:
+    """Read update rows from a CSV or JSONL file, ``-`` for stdin."""
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8", newline="")
+    with handle:
+        text = handle.read()
+
+    first = text.lstrip()[:1]
+    if first == "{":
+        rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        rows = list(csv.DictReader(text.splitlines()))
+        for row in rows:
+            # CSV gives strings, levels are numbers
+            try:
+                row[ATTR_BATTERY_LEVEL] = float(row[ATTR_BATTERY_LEVEL])
+            except (KeyError, TypeError, ValueError):
+                pass
+    return rows
+
+
+async def run_updates(
+    api: TibberGraphAPI,
+    rows: list[dict[str, Any]],
+    concurrency: int,
+    timeout: float | None,
+) -> list[UpdateResult]:
+    """Send all rows with at most ``concurrency`` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def update(index: int, row: dict[str, Any]) -> UpdateResult:
+        vehicle_id = row.get(ATTR_VEHICLE_ID)
+        battery_level = row.get(ATTR_BATTERY_LEVEL)
+        variables = vehicle_soc_variables(vehicle_id, row.get(ATTR_HOME_ID), battery_level)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await api.execute_gql(SET_VEHICLE_SETTINGS, variables, timeout=timeout)
+            except Exception as err:
+                return UpdateResult(
+                    index, vehicle_id, battery_level, False, time.perf_counter() - started, str(err)
+                )
+            return UpdateResult(
+                index, vehicle_id, battery_level, True, time.perf_counter() - started
+            )
+
+    return await asyncio.gather(*(update(i, row) for i, row in enumerate(rows, 1)))
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return the nearest-rank percentile of sorted values."""
+    rank = math.ceil(percent / 100 * len(values))
+    return values[max(0, min(len(values), rank) - 1)]
+
+
+def format_summary(results: list[UpdateResult], wall: float, login: float) -> str:
+    """Render aggregate latency statistics of the rows that were sent."""
+    latencies = sorted(result.latency * 1000 for result in results if result.sent)
+    ok = sum(result.ok for result in results)
+    lines = [
+        f"rows={len(results)} sent={len(latencies)} ok={ok} failed={len(results) - ok} "
+        f"login_ms={login * 1000:.1f} wall_s={wall:.3f} "
+        f"throughput={len(latencies) / wall if wall else 0:.1f}/s",
+    ]
+    if latencies:
+        lines.append(
+            f"latency_ms min={latencies[0]:.1f} mean={statistics.fmean(latencies):.1f} "
+            f"p50={_percentile(latencies, 50):.1f} p95={_percentile(latencies, 95):.1f} "
+            f"max={latencies[-1]:.1f}"
+        )
+    return "\n".join(lines)
+
+
+class SpanCollector:
+    """Trace hook that keeps span durations per span name."""
+
+    def __init__(self) -> None:
+        """Initialize the collector."""
+        self.durations: dict[str, list[float]] = defaultdict(list)
+
+    def __call__(self, name: str, start: int, end: int, attributes: Mapping[str, Any]) -> None:
+        """Record one span in milliseconds."""
+        self.durations[name].append((end - start) / 1e6)
+
+    def format(self) -> str:
+        """Render count, mean and p95 per span."""
+        lines = []
+        for name, values in sorted(self.durations.items()):
+            values = sorted(values)
+            lines.append(
+                f"span {name} count={len(values)} mean_ms={statistics.fmean(values):.2f} "
+                f"p95_ms={_percentile(values, 95):.2f} total_ms={sum(values):.1f}"
+            )
+        return "\n".join(lines)
+
+
+async def _main(args: argparse.Namespace) -> int:
+    """Run the updates and print the report, return the exit code."""
+    rows = read_rows(args.input)
+    sim = None
+    base_url = args.base_url
+    username = os.environ.get(ENV_USERNAME)
+    password = os.environ.get(ENV_PASSWORD)
+
+    if args.simulate:
+        from .simulator import StandInTibber
+
+        sim = StandInTibber(
+            vehicle_ids=sorted({str(row.get(ATTR_VEHICLE_ID)) for row in rows}) or ("sim-vehicle",)
+        )
+        if args.transport == TRANSPORT_IN_PROCESS:
+            # Any URL will do, requests never leave the process
+            base_url = "http://stand-in.invalid"
+        else:
+            base_url = await sim.start()
+        username, password = sim.username, sim.password
+    elif not username or not password:
+        print(f"Set {ENV_USERNAME} and {ENV_PASSWORD}", file=sys.stderr)
+        return 2
+
+    # Rows that cannot be sent are reported without touching the network
+    invalid = []
+    for index, row in enumerate(rows, 1):
+        try:
+            SET_VEHICLE_SETTINGS.validate(vehicle_soc_variables(
+                row.get(ATTR_VEHICLE_ID), row.get(ATTR_HOME_ID), row.get(ATTR_BATTERY_LEVEL)
+            ))
+        except ValueError as err:
+            invalid.append(UpdateResult(
+                index, row.get(ATTR_VEHICLE_ID), row.get(ATTR_BATTERY_LEVEL), False, 0.0, str(err),
+                sent=False,
+            ))
+    invalid_rows = {result.row for result in invalid}
+    valid = [row for index, row in enumerate(rows, 1) if index not in invalid_rows]
+
+    transport: Transport | None = None
+    if args.transport == TRANSPORT_HTTP2:
+        try:
+            transport = HttpxTransport()
+        except RuntimeError as err:
+            print(err, file=sys.stderr)
+            if sim is not None:
+                await sim.stop()
+            return 2
+    elif args.transport == TRANSPORT_IN_PROCESS:
+        transport = InProcessTransport(sim.handle)
+
+    spans = SpanCollector() if args.trace else None
+    try:
+        async with aiohttp.ClientSession(
+            trace_configs=[aiohttp_trace_config()] if spans else None
+        ) as session:
+            api_kwargs = {} if base_url is None else {
+                "base_url": base_url, "alternative_login_urls": []
+            }
+            api = TibberGraphAPI(
+                session, username, password, transport=transport, **api_kwargs
+            )
+
+            try:
+                started = time.perf_counter()
+                try:
+                    await api.authenticate(timeout=args.timeout)
+                except Exception as err:
+                    # Wrong credentials or an unreachable server, no traceback
+                    print(f"Login failed: {err or type(err).__name__}", file=sys.stderr)
+                    return 2
+                login = time.perf_counter() - started
+
+                # Only the updates are traced, not the login above
+                api.trace_hook = spans
+
+                started = time.perf_counter()
+                results = await run_updates(api, valid, args.concurrency, args.timeout)
+                wall = time.perf_counter() - started
+            finally:
+                if transport is not None:
+                    await transport.close()
+    finally:
+        if sim is not None:
+            await sim.stop()
+
+    # Report rows in input order with their original numbers
+    numbers = [index for index in range(1, len(rows) + 1) if index not in invalid_rows]
+    for result, number in zip(results, numbers):
+        result.row = number
+    results = sorted([*results, *invalid], key=lambda result: result.row)
+
+    for result in results:
+        status = "ok" if result.ok else f"error: {result.error}"
+        print(
+            f"{result.row}\t{result.vehicle_id}\t{result.battery_level}\t"
+            f"{result.latency * 1000:.1f}ms\t{status}"
+        )
+    print(format_summary(results, wall, login))
+    if spans is not None:
+        print(spans.format())
+    return 0 if all(result.ok for result in results) else 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Parse arguments and run."""
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.tibber_soc_updater",
+        description="Set the SoC of many vehicles and report per-request latency.",
+    )
+    parser.add_argument("input", help="CSV or JSONL file with vehicle_id, home_id and battery_level, - for stdin")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="updates in flight at once (default 4)")
+    parser.add_argument("-t", "--timeout", type=float, default=30, help="end-to-end timeout per update in seconds (default 30)")
+    parser.add_argument("--base-url", help="talk to another server than app.tibber.com")
+    parser.add_argument("--simulate", action="store_true", help="run against the local stand-in server")
+    parser.add_argument(
+        "--transport",
+        choices=(TRANSPORT_AIOHTTP, TRANSPORT_HTTP2, TRANSPORT_IN_PROCESS),
+        default=TRANSPORT_AIOHTTP,
+        help="how requests are sent (default aiohttp); in-process needs --simulate, http2 needs httpx[http2]",
+    )
+    parser.add_argument("--trace", action="store_true", help="report time spent per request phase")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log debug output to stderr")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.transport == TRANSPORT_IN_PROCESS and not args.simulate:
+        parser.error("--transport in-process needs --simulate")
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING)
+    return asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
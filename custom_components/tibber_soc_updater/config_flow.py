@@ -13,6 +13,7 @@ from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from . import TibberGraphAPI
 from .const import DOMAIN
+from .operations import GET_VIEWER
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -33,17 +34,11 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str,
         await api.authenticate()
         _LOGGER.debug("Authentication successful")
 
-        # For service-only integration, we just need to verify authentication
-        # The actual vehicle_id and home_id will be provided when calling the service
+        # Only authentication is verified here, vehicles are
+        # discovered by the coordinator and the service takes explicit IDs
         try:
             # Simple test to verify authentication works
-            user_info = await api.execute_gql("""
-                query {
-                    me {
-                        id
-                    }
-                }
-            """)
+            user_info = await api.execute_gql(GET_VIEWER)
             
             _LOGGER.debug("Authentication test successful: %s", user_info)
             
@@ -2,10 +2,7 @@
 
 DOMAIN = "tibber_soc_updater"
 DEFAULT_SCAN_INTERVAL = 60  # seconds
-DEFAULT_VEHICLE_INDEX = 0
-
-# Configuration
-CONF_VEHICLE_INDEX = "vehicle_index"
+DEFAULT_REQUEST_TIMEOUT = 30  # seconds, end-to-end budget per coordinator refresh
 
 # Sensor attributes
 ATTR_VEHICLE_ID = "vehicle_id"
@@ -15,20 +12,118 @@ ATTR_RANGE = "range"
 ATTR_CHARGING = "charging"
 ATTR_CHARGING_POWER = "charging_power"
 ATTR_CONNECTED = "connected"
+ATTR_NAME = "name"
+
+# Services
+SERVICE_SET_VEHICLE_SOC = "set_vehicle_soc"
+SERVICE_FIND_CHEAPEST_WINDOW = "find_cheapest_window"
+
+# Service attributes
+ATTR_TIMEOUT = "timeout"
+ATTR_BACKGROUND = "background"
+ATTR_OPTIMISTIC = "optimistic"
+ATTR_DURATION = "duration"
+ATTR_BEFORE = "before"
+
+# Vehicle setting keys
+SETTING_BATTERY_LEVEL = "offline.vehicle.batteryLevel"
 
 # GraphQL Queries
-QUERY_GET_VEHICLE = """
-query GetVehicle($homeId: ID!) {
+QUERY_TYPENAME = """
+query Typename { __typename }
+"""
+
+QUERY_GET_VIEWER = """
+query GetViewer {
     me {
-        home(id: $homeId) {
+        id
+    }
+}
+"""
+
+# Everything the sensors need for every vehicle of every home, fetched in a
+# single request per coordinator refresh. Only fields seen in real responses
+# are selected: GraphQL rejects the whole document for one unknown field.
+QUERY_GET_HOME_SNAPSHOT = """
+query GetHomeSnapshot {
+    me {
+        homes {
             id
-            vehicles {
+            electricVehicles {
                 id
-                batteryLevel
-                range
-                connected
-                charging
-                chargingPower
+                shortName
+                battery {
+                    percent
+                    isCharging
+                }
+            }
+        }
+    }
+}
+"""
+
+QUERY_GET_PRICE_INFO = """
+query GetPriceInfo($homeId: ID!) {
+    me {
+        home(id: $homeId) {
+            currentSubscription {
+                priceInfo {
+                    today {
+                        total
+                        startsAt
+                    }
+                    tomorrow {
+                        total
+                        startsAt
+                    }
+                }
+            }
+        }
+    }
+}
+"""
+
+# Only the parts of the schema the startup checks look at
+QUERY_INTROSPECT_SCHEMA = """
+query IntrospectSchema {
+    __schema {
+        queryType {
+            name
+        }
+        mutationType {
+            name
+        }
+        types {
+            name
+            kind
+            fields {
+                name
+                args {
+                    name
+                    type {
+                        ...TypeRef
+                    }
+                }
+                type {
+                    ...TypeRef
+                }
+            }
+        }
+    }
+}
+
+fragment TypeRef on __Type {
+    kind
+    name
+    ofType {
+        kind
+        name
+        ofType {
+            kind
+            name
+            ofType {
+                kind
+                name
             }
         }
     }
@@ -43,4 +138,4 @@ mutation SetVehicleSettings($vehicleId: String!, $homeId: String!, $settings: [S
         }
     }
 }
-""" 
\ No newline at end of file
+"""
@@ -0,0 +1,201 @@
+"""Account-level data coordinator for the Tibber GraphAPI integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+import logging
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+
+from .const import (
+    DOMAIN,
+    DEFAULT_REQUEST_TIMEOUT,
+    ATTR_CHARGING,
+    ATTR_HOME_ID,
+    ATTR_NAME,
+    ATTR_VEHICLE_ID,
+)
+from .operations import GET_HOME_SNAPSHOT
+
+if TYPE_CHECKING:
+    from . import TibberGraphAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DeviceState(NamedTuple):
+    """State of a single vehicle in the account snapshot."""
+
+    home_id: str
+    device_id: str
+    name: str | None
+    battery_level: float | None
+    charging: bool | None
+
+
+class AccountSnapshot(NamedTuple):
+    """All vehicles of every home of the account, keyed by vehicle ID."""
+
+    devices: dict[str, DeviceState]
+    # State attributes per device, built once per snapshot and shared by its entities
+    attributes: dict[str, dict[str, Any]]
+
+
+def _parse_homes(homes: list[dict[str, Any]]) -> AccountSnapshot:
+    """Flatten the homes from the snapshot query into a device state table."""
+    devices: dict[str, DeviceState] = {}
+    for home in homes:
+        for vehicle in home.get("electricVehicles") or []:
+            battery = vehicle.get("battery") or {}
+            devices[vehicle["id"]] = DeviceState(
+                home_id=home["id"],
+                device_id=vehicle["id"],
+                name=vehicle.get("shortName"),
+                battery_level=battery.get("percent"),
+                charging=battery.get("isCharging"),
+            )
+    return AccountSnapshot(
+        devices=devices,
+        attributes={
+            device_id: _device_attributes(state)
+            for device_id, state in devices.items()
+        },
+    )
+
+
+def _device_attributes(state: DeviceState) -> dict[str, Any]:
+    """Return the state attributes shared by the entities of a device."""
+    return {
+        ATTR_VEHICLE_ID: state.device_id,
+        ATTR_HOME_ID: state.home_id,
+        ATTR_NAME: state.name,
+        ATTR_CHARGING: state.charging,
+    }
+
+
+def _diff_snapshots(
+    previous: AccountSnapshot | None, current: AccountSnapshot
+) -> dict[str, frozenset[str]]:
+    """Return the changed DeviceState fields per device ID."""
+    all_fields = frozenset(DeviceState._fields)
+    if previous is None:
+        return {device_id: all_fields for device_id in current.devices}
+
+    changes = {}
+    for device_id in previous.devices.keys() | current.devices.keys():
+        old = previous.devices.get(device_id)
+        new = current.devices.get(device_id)
+        if old == new:
+            continue
+        if old is None or new is None:
+            # Device appeared or disappeared
+            changes[device_id] = all_fields
+        else:
+            changes[device_id] = frozenset(
+                name for name, old_value, new_value in zip(DeviceState._fields, old, new)
+                if old_value != new_value
+            )
+    return changes
+
+
+def _with_battery_level(
+    snapshot: AccountSnapshot, device_id: str, battery_level: float
+) -> AccountSnapshot:
+    """Return a copy of the snapshot with one vehicle's battery level replaced."""
+    devices = dict(snapshot.devices)
+    devices[device_id] = devices[device_id]._replace(battery_level=battery_level)
+    return snapshot._replace(devices=devices)
+
+
+class TibberHomeDataUpdateCoordinator(DataUpdateCoordinator[AccountSnapshot]):
+    """Fetch every vehicle of every home with one query per refresh."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: TibberGraphAPI,
+        update_interval: timedelta,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=update_interval,
+        )
+        self.api = api
+        self.request_timeout = request_timeout
+        # Fields that changed per device in the latest refresh
+        self.changes: dict[str, frozenset[str]] = {}
+        # Battery levels acknowledged by Tibber but not yet seen in a fetch,
+        # with the time.monotonic() they were applied at
+        self.optimistic: dict[str, tuple[float, float]] = {}
+
+    @callback
+    def async_apply_battery_level(
+        self, home_id: str, device_id: str, battery_level: float
+    ) -> None:
+        """Show an acknowledged battery level before the next fetch confirms it."""
+        if not self.data:
+            return
+        state = self.data.devices.get(device_id)
+        if state is None or state.home_id != home_id:
+            return
+        self.optimistic[device_id] = (battery_level, time.monotonic())
+        previous = self.data
+        self.data = _with_battery_level(previous, device_id, battery_level)
+        # Always mark the field, the optimistic flag changes even if the value does not
+        self.changes = {device_id: frozenset({"battery_level"})}
+        # Not async_set_updated_data, which would push back the next poll
+        self.async_update_listeners()
+
+    def _reconcile(self, snapshot: AccountSnapshot, started: float) -> AccountSnapshot:
+        """Confirm or roll back optimistic levels against a fetched snapshot."""
+        for device_id, (level, applied_at) in list(self.optimistic.items()):
+            state = snapshot.devices.get(device_id)
+            if state is None:
+                del self.optimistic[device_id]
+            elif applied_at >= started:
+                # The fetch may predate the write, keep showing the written level
+                snapshot = _with_battery_level(snapshot, device_id, level)
+            else:
+                del self.optimistic[device_id]
+                if state.battery_level != level:
+                    _LOGGER.warning(
+                        "Tibber reports battery level %s for vehicle %s instead of the "
+                        "acknowledged %s, rolling back",
+                        state.battery_level,
+                        device_id,
+                        level,
+                    )
+        return snapshot
+
+    async def _async_update_data(self) -> AccountSnapshot:
+        """Fetch the snapshot of the home from the API."""
+        # Listeners are also called when the refresh fails, nothing changed then
+        self.changes = {}
+        started = time.monotonic()
+        try:
+            result = await self.api.execute_gql(
+                GET_HOME_SNAPSHOT, timeout=self.request_timeout
+            )
+        except Exception as err:
+            raise UpdateFailed(f"Failed to fetch home snapshot: {err}") from err
+
+        homes = (result.get("me") or {}).get("homes") or []
+        if not homes:
+            raise UpdateFailed("No homes found for this Tibber account")
+
+        resolved = set(self.optimistic)
+        snapshot = self._reconcile(_parse_homes(homes), started)
+        self.changes = _diff_snapshots(self.data, snapshot)
+        for device_id in resolved - self.optimistic.keys():
+            # Clear the optimistic flag, also when the level was confirmed
+            self.changes[device_id] = self.changes.get(device_id, frozenset()) | {"battery_level"}
+        return snapshot
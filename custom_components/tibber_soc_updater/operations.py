@@ -0,0 +1,289 @@
+"""Registry of the GraphQL operations sent to Tibber.
+
+Every document is tokenized once at import time. The registry keeps a
+minified copy to send over the wire and the declared variable types, so
+variables can be checked locally before any network call.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+import re
+from typing import Any, NamedTuple
+
+from .const import (
+    MUTATION_SET_VEHICLE_SOC,
+    QUERY_GET_HOME_SNAPSHOT,
+    QUERY_GET_PRICE_INFO,
+    QUERY_GET_VIEWER,
+    QUERY_INTROSPECT_SCHEMA,
+    QUERY_TYPENAME,
+    SETTING_BATTERY_LEVEL,
+)
+
+# Lexical tokens of a GraphQL document; commas are insignificant
+_TOKEN_RE = re.compile(
+    r'''
+    (?P<ignored>[\s,\ufeff]+|\#[^\n\r]*)
+    |(?P<block>"""(?:\\"""|[^"]|"(?!""))*""")
+    |(?P<string>"(?:\\.|[^"\\\n\r])*")
+    |(?P<spread>\.\.\.)
+    |(?P<punct>[!$&():=@\[\]{|}])
+    |(?P<number>-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    |(?P<name>[_A-Za-z][_0-9A-Za-z]*)
+    ''',
+    re.VERBOSE,
+)
+
+# Token kinds that would merge into one token without a space between them
+_WORDLIKE = {"name", "number"}
+
+_INT_MIN = -(2**31)
+_INT_MAX = 2**31 - 1
+
+
+class OperationValidationError(ValueError):
+    """Raised when variables do not match an operation's declared types."""
+
+
+class TypeRef(NamedTuple):
+    """A GraphQL input type such as ``[SettingsItemInput!]``."""
+
+    name: str | None  # Named type, None for a list
+    of_type: TypeRef | None  # Item type of a list
+    non_null: bool
+
+    def __str__(self) -> str:
+        """Return the type in GraphQL notation."""
+        text = self.name if self.of_type is None else f"[{self.of_type}]"
+        return f"{text}!" if self.non_null else text
+
+
+def _tokenize(document: str) -> list[tuple[str, str]]:
+    """Split a document into (kind, text) tokens, dropping ignored ones."""
+    tokens = []
+    position = 0
+    while position < len(document):
+        match = _TOKEN_RE.match(document, position)
+        if match is None:
+            raise ValueError(f"Unexpected character {document[position]!r} at {position} in GraphQL document")
+        kind = match.lastgroup
+        if kind != "ignored":
+            tokens.append((kind, match.group()))
+        position = match.end()
+    return tokens
+
+
+def minify(document: str) -> str:
+    """Return the document with comments and redundant whitespace removed."""
+    parts = []
+    previous = None
+    for kind, text in _tokenize(document):
+        if previous in _WORDLIKE and kind in _WORDLIKE:
+            parts.append(" ")
+        parts.append(text)
+        previous = kind
+    return "".join(parts)
+
+
+def _parse_type(tokens: list[tuple[str, str]], index: int) -> tuple[TypeRef, int]:
+    """Parse a type reference starting at ``index``."""
+    kind, text = tokens[index]
+    if text == "[":
+        of_type, index = _parse_type(tokens, index + 1)
+        if tokens[index][1] != "]":
+            raise ValueError("Unterminated list type in GraphQL document")
+        index += 1
+        name = None
+    elif kind == "name":
+        of_type = None
+        name = text
+        index += 1
+    else:
+        raise ValueError(f"Unexpected {text!r} in variable type")
+
+    non_null = index < len(tokens) and tokens[index][1] == "!"
+    if non_null:
+        index += 1
+    return TypeRef(name, of_type, non_null), index
+
+
+def _parse_variables(tokens: list[tuple[str, str]]) -> tuple[str, dict[str, TypeRef], frozenset[str]]:
+    """Return the operation name, its variable types and which have defaults."""
+    index = 0
+    name = ""
+    if tokens and tokens[0][1] in ("query", "mutation", "subscription"):
+        index = 1
+        if index < len(tokens) and tokens[index][0] == "name":
+            name = tokens[index][1]
+            index += 1
+
+    variables: dict[str, TypeRef] = {}
+    defaults = set()
+    if index < len(tokens) and tokens[index][1] == "(":
+        index += 1
+        while tokens[index][1] != ")":
+            if tokens[index][1] != "$" or tokens[index + 2][1] != ":":
+                raise ValueError("Malformed variable definition in GraphQL document")
+            variable = tokens[index + 1][1]
+            type_ref, index = _parse_type(tokens, index + 3)
+            variables[variable] = type_ref
+            if tokens[index][1] == "=":
+                # Skip the default value, which may be a nested list or object
+                defaults.add(variable)
+                depth = 0
+                index += 1
+                while depth or tokens[index][1] not in (")", "$", "@"):
+                    if tokens[index][1] in ("[", "{"):
+                        depth += 1
+                    elif tokens[index][1] in ("]", "}"):
+                        depth -= 1
+                    index += 1
+    return name, variables, frozenset(defaults)
+
+
+# Fields of the input object types used by the registered operations
+INPUT_TYPES: dict[str, dict[str, str | None]] = {
+    # `value` is a JSON scalar whose shape depends on the setting key
+    "SettingsItemInput": {"key": "String!", "value": None},
+}
+_INPUT_TYPE_REFS: dict[str, dict[str, TypeRef | None]] = {
+    type_name: {
+        field_name: None if field_type is None else _parse_type(_tokenize(field_type), 0)[0]
+        for field_name, field_type in fields.items()
+    }
+    for type_name, fields in INPUT_TYPES.items()
+}
+
+
+def _check_value(value: Any, type_ref: TypeRef, where: str) -> None:
+    """Raise OperationValidationError if ``value`` does not fit ``type_ref``."""
+    if value is None:
+        if type_ref.non_null:
+            raise OperationValidationError(f"{where} must not be null ({type_ref})")
+        return
+
+    if type_ref.of_type is not None:
+        # Input coercion allows a single item where a list is expected
+        items = value if isinstance(value, (list, tuple)) else [value]
+        for i, item in enumerate(items):
+            _check_value(item, type_ref.of_type, f"{where}[{i}]")
+        return
+
+    name = type_ref.name
+    if name == "Int":
+        if isinstance(value, bool) or not isinstance(value, int) or not _INT_MIN <= value <= _INT_MAX:
+            raise OperationValidationError(f"{where} must be an Int, got {value!r}")
+    elif name == "Float":
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise OperationValidationError(f"{where} must be a Float, got {value!r}")
+    elif name == "String":
+        if not isinstance(value, str):
+            raise OperationValidationError(f"{where} must be a String, got {value!r}")
+    elif name == "ID":
+        if isinstance(value, bool) or not isinstance(value, (str, int)):
+            raise OperationValidationError(f"{where} must be an ID, got {value!r}")
+    elif name == "Boolean":
+        if not isinstance(value, bool):
+            raise OperationValidationError(f"{where} must be a Boolean, got {value!r}")
+    elif name in INPUT_TYPES:
+        if not isinstance(value, Mapping):
+            raise OperationValidationError(f"{where} must be a {name} object, got {value!r}")
+        fields = _INPUT_TYPE_REFS[name]
+        unknown = set(value) - set(fields)
+        if unknown:
+            raise OperationValidationError(f"{where} has unknown fields for {name}: {sorted(unknown)}")
+        for field_name, field_type in fields.items():
+            if field_type is not None:
+                _check_value(value.get(field_name), field_type, f"{where}.{field_name}")
+    # Other named types are not known locally and are left to the server
+
+
+@dataclass(frozen=True)
+class Operation:
+    """A parsed GraphQL operation, ready to be sent."""
+
+    name: str
+    document: str
+    variables: Mapping[str, TypeRef]
+    defaults: frozenset[str] = frozenset()
+    check: Callable[[Mapping[str, Any]], None] | None = field(default=None, compare=False)
+
+    def validate(self, variables: Mapping[str, Any] | None) -> None:
+        """Check variables against the declared types, without any I/O."""
+        variables = variables or {}
+        unknown = set(variables) - set(self.variables)
+        if unknown:
+            raise OperationValidationError(f"{self.name}: unknown variables {sorted(unknown)}")
+        for variable, type_ref in self.variables.items():
+            if variable not in variables:
+                if type_ref.non_null and variable not in self.defaults:
+                    raise OperationValidationError(f"{self.name}: missing required variable ${variable} ({type_ref})")
+                continue
+            _check_value(variables[variable], type_ref, f"{self.name}: ${variable}")
+        if self.check is not None:
+            self.check(variables)
+
+
+OPERATIONS: dict[str, Operation] = {}
+
+
+def register(
+    document: str, check: Callable[[Mapping[str, Any]], None] | None = None
+) -> Operation:
+    """Parse a document once and add it to the registry."""
+    tokens = _tokenize(document)
+    name, variables, defaults = _parse_variables(tokens)
+    name = name or f"anonymous_{len(OPERATIONS)}"
+    if name in OPERATIONS:
+        raise ValueError(f"Duplicate GraphQL operation {name}")
+    operation = Operation(name, minify(document), variables, defaults, check)
+    OPERATIONS[name] = operation
+    return operation
+
+
+def _check_vehicle_settings(variables: Mapping[str, Any]) -> None:
+    """Reject setting values the app would not accept."""
+    settings = variables.get("settings") or []
+    if not isinstance(settings, (list, tuple)):
+        # A single item is coerced to a list, as in _check_value
+        settings = [settings]
+    for item in settings:
+        if item.get("key") == SETTING_BATTERY_LEVEL:
+            value = item.get("value")
+            if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value <= 100:
+                raise OperationValidationError(
+                    f"Invalid battery level: {value!r}. Must be between 0 and 100"
+                )
+
+
+def vehicle_soc_variables(
+    vehicle_id: str, home_id: str, battery_level: Any
+) -> dict[str, Any]:
+    """Return the SetVehicleSettings variables that set a battery level."""
+    # In-range levels are truncated to integers, anything else (booleans
+    # included) is left as is so validation rejects it
+    if (
+        isinstance(battery_level, (int, float))
+        and not isinstance(battery_level, bool)
+        and 0 <= battery_level <= 100
+    ):
+        battery_level = int(battery_level)
+    return {
+        "vehicleId": vehicle_id,
+        "homeId": home_id,
+        "settings": [
+            {
+                "key": SETTING_BATTERY_LEVEL,
+                "value": battery_level,
+            }
+        ],
+    }
+
+
+TYPENAME = register(QUERY_TYPENAME)
+GET_VIEWER = register(QUERY_GET_VIEWER)
+GET_HOME_SNAPSHOT = register(QUERY_GET_HOME_SNAPSHOT)
+GET_PRICE_INFO = register(QUERY_GET_PRICE_INFO)
+INTROSPECT_SCHEMA = register(QUERY_INTROSPECT_SCHEMA)
+SET_VEHICLE_SETTINGS = register(MUTATION_SET_VEHICLE_SOC, check=_check_vehicle_settings)
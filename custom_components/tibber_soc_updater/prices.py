@@ -0,0 +1,172 @@
+"""Day-ahead price curve with an index for cheapest charging windows."""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time as dt_time, timedelta, tzinfo
+import math
+from typing import NamedTuple
+
+# Tibber publishes tomorrow's prices in the early afternoon, local time
+PRICE_PUBLISH_TIME = dt_time(13, 0)
+# How often to look for tomorrow's prices once they are due but missing
+PRICE_RETRY_INTERVAL = timedelta(minutes=15)
+
+
+class PriceWindow(NamedTuple):
+    """A contiguous run of price slots."""
+
+    start: datetime
+    end: datetime
+    total: float
+    average: float
+
+
+class PriceCurve:
+    """Prices of today and tomorrow, indexed for cheapest-window queries.
+
+    Window sums come from prefix sums, and for every window length that
+    has been asked for, a sparse table answers "cheapest start in this
+    range" in O(1). Mapping times to slots is a bisect, so a query costs
+    O(log n) once its window length has been indexed.
+
+    Slots without a price are left out, which leaves a gap between the
+    neighbouring starts. Windows across a gap cost infinity, so they are
+    never picked.
+    """
+
+    def __init__(self, slots: list[tuple[datetime, float]], fetched_at: datetime) -> None:
+        """Initialize the curve from (start, price) pairs."""
+        if not slots:
+            raise ValueError("A price curve needs at least one slot")
+        slots = sorted(slots)
+        self.fetched_at = fetched_at
+        self.starts = [start for start, _ in slots]
+        self.prices = [price for _, price in slots]
+        steps = [later - earlier for earlier, later in zip(self.starts, self.starts[1:])]
+        # A longer step than the shortest one means slots are missing there
+        self.slot_length = min((step for step in steps if step), default=timedelta(hours=1))
+
+        self._prefix = [0.0]
+        for price in self.prices:
+            self._prefix.append(self._prefix[-1] + price)
+        # Number of slots up to each index that do not follow on the previous one
+        self._gaps = [0]
+        for step in steps:
+            self._gaps.append(self._gaps[-1] + (step != self.slot_length))
+        # Window length in slots -> sparse table of cheapest start indexes
+        self._tables: dict[int, list[list[int]]] = {}
+
+    @property
+    def tz(self) -> tzinfo | None:
+        """Return the time zone the prices are published in."""
+        return self.starts[0].tzinfo
+
+    @property
+    def day(self) -> date:
+        """Return the first day covered by the curve."""
+        return self.starts[0].date()
+
+    @property
+    def end(self) -> datetime:
+        """Return the end of the last slot."""
+        return self.starts[-1] + self.slot_length
+
+    @property
+    def has_tomorrow(self) -> bool:
+        """Return if the curve extends past its first day."""
+        return self.starts[-1].date() > self.day
+
+    def is_fresh(self, now: datetime) -> bool:
+        """Return if the curve can still be used at ``now``."""
+        local_now = now.astimezone(self.tz)
+        if local_now.date() != self.day:
+            # Day boundary passed, today's curve is now yesterday's
+            return False
+        if self.has_tomorrow or local_now.time() < PRICE_PUBLISH_TIME:
+            return True
+        return now - self.fetched_at < PRICE_RETRY_INTERVAL
+
+    def _window_sum(self, start: int, length: int) -> float:
+        """Return the summed price of ``length`` slots from ``start``, inf across a gap."""
+        if self._gaps[start + length - 1] != self._gaps[start]:
+            return math.inf
+        return self._prefix[start + length] - self._prefix[start]
+
+    def _table(self, length: int) -> list[list[int]]:
+        """Return the sparse table of cheapest starts for a window length."""
+        table = self._tables.get(length)
+        if table is not None:
+            return table
+
+        count = len(self.prices) - length + 1
+        table = [list(range(count))]
+        span = 1
+        while span * 2 <= count:
+            previous = table[-1]
+            row = []
+            for i in range(count - span * 2 + 1):
+                left, right = previous[i], previous[i + span]
+                row.append(
+                    left if self._window_sum(left, length) <= self._window_sum(right, length) else right
+                )
+            table.append(row)
+            span *= 2
+        self._tables[length] = table
+        return table
+
+    def _cheapest_start(self, length: int, first: int, last: int) -> int:
+        """Return the cheapest window start within [first, last]."""
+        table = self._table(length)
+        level = (last - first + 1).bit_length() - 1
+        left = table[level][first]
+        right = table[level][last - (1 << level) + 1]
+        return left if self._window_sum(left, length) <= self._window_sum(right, length) else right
+
+    def cheapest_window(
+        self,
+        duration: timedelta,
+        before: datetime | None = None,
+        after: datetime | None = None,
+    ) -> PriceWindow | None:
+        """Return the cheapest contiguous window of ``duration``.
+
+        The window starts at the first slot boundary at or after ``after``,
+        so it never includes time that has already passed, and ends no
+        later than ``before``. Returns None if no window fits, including
+        when every candidate spans missing prices.
+        """
+        length = max(1, math.ceil(duration / self.slot_length))
+        if length > len(self.prices):
+            return None
+
+        first = 0
+        if after is not None:
+            first = bisect_left(self.starts, after)
+        last = len(self.prices) - length
+        if before is not None:
+            # Last slot of the window has to end by `before`
+            last = min(last, bisect_right(self.starts, before - self.slot_length) - length)
+        if last < first:
+            return None
+
+        start = self._cheapest_start(length, first, last)
+        total = self._window_sum(start, length)
+        if math.isinf(total):
+            return None
+        return PriceWindow(
+            start=self.starts[start],
+            end=self.starts[start + length - 1] + self.slot_length,
+            total=total,
+            average=total / length,
+        )
+
+
+def parse_price_info(price_info: dict, fetched_at: datetime) -> PriceCurve:
+    """Build a price curve from a ``priceInfo`` GraphQL object."""
+    slots = [
+        (datetime.fromisoformat(entry["startsAt"]), float(entry["total"]))
+        for day in ("today", "tomorrow")
+        for entry in price_info.get(day) or []
+        if entry.get("total") is not None
+    ]
+    return PriceCurve(slots, fetched_at)
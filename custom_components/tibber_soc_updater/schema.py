@@ -0,0 +1,185 @@
+"""Cached snapshot of the Tibber GraphQL schema."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+import hashlib
+import json
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .operations import SET_VEHICLE_SETTINGS, GET_PRICE_INFO
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bump when the stored layout changes, older data is then discarded
+SCHEMA_STORE_VERSION = 1
+SCHEMA_STORE_KEY = f"{DOMAIN}.schema"
+# Introspection is refreshed this rarely, the API changes far less often
+SCHEMA_MAX_AGE = timedelta(days=7)
+
+# Fields the integration relies on: (root operation, field path, argument types)
+EXPECTED_FIELDS: list[tuple[str, tuple[str, ...], dict[str, str]]] = [
+    (
+        "mutation",
+        ("me", "setVehicleSettings"),
+        {
+            "id": str(SET_VEHICLE_SETTINGS.variables["vehicleId"]),
+            "homeId": str(SET_VEHICLE_SETTINGS.variables["homeId"]),
+            "settings": str(SET_VEHICLE_SETTINGS.variables["settings"]),
+        },
+    ),
+    ("query", ("me", "homes"), {}),
+    # Fields selected by GetHomeSnapshot, one wrong name fails every refresh
+    *(
+        ("query", ("me", "homes", "electricVehicles", name), {})
+        for name in ("id", "shortName", "battery")
+    ),
+    *(
+        ("query", ("me", "homes", "electricVehicles", "battery", name), {})
+        for name in ("percent", "isCharging")
+    ),
+    ("query", ("me", "home"), {"id": str(GET_PRICE_INFO.variables["homeId"])}),
+]
+
+
+def _type_to_str(type_ref: dict[str, Any] | None) -> str:
+    """Render an introspected type reference in GraphQL notation."""
+    if not type_ref:
+        return "?"
+    kind = type_ref.get("kind")
+    if kind == "NON_NULL":
+        return f"{_type_to_str(type_ref.get('ofType'))}!"
+    if kind == "LIST":
+        return f"[{_type_to_str(type_ref.get('ofType'))}]"
+    return type_ref.get("name") or "?"
+
+
+def _named_type(type_str: str) -> str:
+    """Strip list and non-null wrappers from a rendered type."""
+    return type_str.strip("[]!")
+
+
+class SchemaSnapshot:
+    """Compact view of the object types and fields of the schema."""
+
+    def __init__(
+        self,
+        roots: dict[str, str | None],
+        types: dict[str, dict[str, list]],
+        fetched_at: datetime,
+        client: str,
+    ) -> None:
+        """Initialize the snapshot.
+
+        ``types`` maps a type name to its fields, each a pair of the
+        rendered return type and a mapping of argument types.
+        """
+        self.roots = roots
+        self.types = types
+        self.fetched_at = fetched_at
+        self.client = client
+        self.fingerprint = hashlib.sha256(
+            json.dumps([roots, types], sort_keys=True, separators=(",", ":")).encode()
+        ).hexdigest()
+
+    @classmethod
+    def from_introspection(
+        cls, data: dict[str, Any], fetched_at: datetime, client: str
+    ) -> SchemaSnapshot:
+        """Build a snapshot from an introspection query result."""
+        schema = data["__schema"]
+        roots = {
+            "query": (schema.get("queryType") or {}).get("name"),
+            "mutation": (schema.get("mutationType") or {}).get("name"),
+        }
+        types = {}
+        for type_def in schema.get("types") or []:
+            name = type_def.get("name") or ""
+            if name.startswith("__") or not type_def.get("fields"):
+                continue
+            types[name] = {
+                field["name"]: [
+                    _type_to_str(field.get("type")),
+                    {arg["name"]: _type_to_str(arg.get("type")) for arg in field.get("args") or []},
+                ]
+                for field in type_def["fields"]
+            }
+        return cls(roots, types, fetched_at, client)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> SchemaSnapshot | None:
+        """Restore a snapshot saved with ``as_dict``, None if unusable."""
+        if not data:
+            return None
+        snapshot = cls(
+            data["roots"],
+            data["types"],
+            datetime.fromisoformat(data["fetched_at"]),
+            data["client"],
+        )
+        if snapshot.fingerprint != data.get("fingerprint"):
+            _LOGGER.debug("Cached schema fingerprint mismatch, ignoring cache")
+            return None
+        return snapshot
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable form of the snapshot."""
+        return {
+            "fingerprint": self.fingerprint,
+            "fetched_at": self.fetched_at.isoformat(),
+            "client": self.client,
+            "roots": self.roots,
+            "types": self.types,
+        }
+
+    def is_fresh(self, now: datetime, client: str) -> bool:
+        """Return if the snapshot is recent and was taken by this client version."""
+        return client == self.client and now - self.fetched_at < SCHEMA_MAX_AGE
+
+    def field(self, root: str, path: tuple[str, ...]) -> tuple[str, dict[str, str]] | None:
+        """Return the type and argument types of a field path, None if missing."""
+        type_name = self.roots.get(root)
+        result = None
+        for name in path:
+            fields = self.types.get(type_name or "")
+            if not fields or name not in fields:
+                return None
+            result = fields[name]
+            type_name = _named_type(result[0])
+        return result[0], result[1]
+
+    def problems(self) -> list[str]:
+        """Return how the schema deviates from what the integration expects."""
+        problems = []
+        for root, path, expected_args in EXPECTED_FIELDS:
+            where = f"{root} {'.'.join(path)}"
+            found = self.field(root, path)
+            if found is None:
+                problems.append(f"{where} no longer exists")
+                continue
+            args = found[1]
+            for arg, expected in expected_args.items():
+                if arg not in args:
+                    problems.append(f"{where} lost argument {arg}")
+                elif args[arg] != expected:
+                    problems.append(f"{where} argument {arg} is {args[arg]}, expected {expected}")
+        return problems
+
+
+class SchemaStore(Store[dict[str, Any]]):
+    """Storage for the schema snapshot."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the store."""
+        super().__init__(hass, SCHEMA_STORE_VERSION, SCHEMA_STORE_KEY)
+
+    async def _async_migrate_func(
+        self, old_major_version: int, old_minor_version: int, old_data: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Discard snapshots of another layout, the next refresh rebuilds them."""
+        _LOGGER.debug("Discarding schema cache of version %s", old_major_version)
+        return {}
@@ -1,7 +1,6 @@
 """Support for Tibber GraphAPI sensors."""
 from __future__ import annotations
 
-from datetime import timedelta
 import logging
 from typing import Any
 
@@ -11,33 +10,16 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import (
-    CONF_SCAN_INTERVAL,
-    PERCENTAGE,
-    UnitOfPower,
-    UnitOfLength,
-)
-from homeassistant.core import HomeAssistant
+from homeassistant.const import PERCENTAGE
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.update_coordinator import (
-    CoordinatorEntity,
-    DataUpdateCoordinator,
-)
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from . import TibberGraphAPI
 from .const import (
     DOMAIN,
-    CONF_VEHICLE_INDEX,
-    DEFAULT_VEHICLE_INDEX,
-    QUERY_GET_VEHICLE,
-    ATTR_VEHICLE_ID,
-    ATTR_HOME_ID,
-    ATTR_BATTERY_LEVEL,
-    ATTR_RANGE,
-    ATTR_CHARGING,
-    ATTR_CHARGING_POWER,
-    ATTR_CONNECTED,
+    ATTR_OPTIMISTIC,
 )
+from .coordinator import DeviceState, TibberHomeDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -47,180 +29,100 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up the Tibber GraphAPI sensors."""
-    api: TibberGraphAPI = hass.data[DOMAIN][entry.entry_id]
-    scan_interval = entry.data.get(CONF_SCAN_INTERVAL, 60)
-    vehicle_index = entry.data.get(CONF_VEHICLE_INDEX, DEFAULT_VEHICLE_INDEX)
-
-    coordinator = TibberVehicleDataUpdateCoordinator(
-        hass,
-        api,
-        timedelta(seconds=scan_interval),
-        vehicle_index,
-    )
-
-    await coordinator.async_config_entry_first_refresh()
-
-    entities = [
-        TibberVehicleBatterySensor(coordinator, vehicle_index),
-        TibberVehicleRangeSensor(coordinator, vehicle_index),
-        TibberVehicleChargePowerSensor(coordinator, vehicle_index),
-    ]
-
-    async_add_entities(entities)
-
-class TibberVehicleDataUpdateCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching Tibber vehicle data."""
-
-    def __init__(
-        self,
-        hass: HomeAssistant,
-        api: TibberGraphAPI,
-        update_interval: timedelta,
-        vehicle_index: int,
-    ) -> None:
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=update_interval,
-        )
-        self.api = api
-        self.vehicle_index = vehicle_index
-        self._home_id = None
-        self._vehicle_id = None
-
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Fetch data from API endpoint."""
-        if not self._home_id:
-            # First run, get home ID using the 'me' structure
-            homes = await self.api.execute_gql("""
-                query {
-                    me {
-                        homes {
-                            id
-                        }
-                    }
-                }
-            """)
-            self._home_id = homes["me"]["homes"][0]["id"]
-
-        # Try to get vehicle data using the working query structure
-        try:
-            # First try to get vehicles from myVehicles
-            vehicles_result = await self.api.execute_gql("""
-                query {
-                    me {
-                        myVehicles {
-                            vehicles {
-                                id
-                                title
-                            }
-                        }
-                    }
-                }
-            """)
-            
-            if vehicles_result.get("me", {}).get("myVehicles", {}).get("vehicles"):
-                vehicles = vehicles_result["me"]["myVehicles"]["vehicles"]
-                if self.vehicle_index < len(vehicles):
-                    self._vehicle_id = vehicles[self.vehicle_index]["id"]
-                else:
-                    self._vehicle_id = vehicles[0]["id"] if vehicles else "unknown"
-            else:
-                self._vehicle_id = "unknown"
-                
-        except Exception as e:
-            _LOGGER.debug("Failed to get vehicle data: %s", e)
-            self._vehicle_id = "unknown"
-
-        # For now, return mock data since we can't get real vehicle data yet
-        # This will allow the integration to be set up successfully
-        return {
-            ATTR_VEHICLE_ID: self._vehicle_id,
-            ATTR_HOME_ID: self._home_id,
-            ATTR_BATTERY_LEVEL: 0,  # Mock data
-            ATTR_RANGE: 0,  # Mock data
-            ATTR_CHARGING: False,  # Mock data
-            ATTR_CHARGING_POWER: 0,  # Mock data
-            ATTR_CONNECTED: False,  # Mock data
-        }
-
-class TibberVehicleBatterySensor(CoordinatorEntity, SensorEntity):
-    """Representation of a vehicle battery level sensor."""
-
-    _attr_device_class = SensorDeviceClass.BATTERY
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = PERCENTAGE
-
-    def __init__(self, coordinator: TibberVehicleDataUpdateCoordinator, vehicle_index: int) -> None:
-        """Initialize the sensor."""
+    coordinator: TibberHomeDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id].coordinator
+    known: set[str] = set()
+
+    @callback
+    def add_new_devices() -> None:
+        """Add entities for devices not seen before.
+
+        Also covers a first refresh that failed during setup: the sensors
+        appear with the first snapshot that arrives.
+        """
+        if not coordinator.data:
+            return
+        entities: list[SensorEntity] = []
+        for state in coordinator.data.devices.values():
+            if state.device_id in known:
+                continue
+            known.add(state.device_id)
+            entities.append(TibberVehicleBatterySensor(coordinator, state.device_id))
+        if entities:
+            async_add_entities(entities)
+
+    add_new_devices()
+    entry.async_on_unload(coordinator.async_add_listener(add_new_devices))
+
+class TibberDeviceEntity(CoordinatorEntity[TibberHomeDataUpdateCoordinator]):
+    """Base class for entities backed by one device of the account snapshot."""
+
+    # DeviceState fields the state or attributes of the entity depend on
+    _watched_fields: frozenset[str] = frozenset({"home_id", "name", "charging"})
+
+    def __init__(self, coordinator: TibberHomeDataUpdateCoordinator, device_id: str) -> None:
+        """Initialize the entity."""
         super().__init__(coordinator)
-        self._vehicle_index = vehicle_index
-        self._attr_unique_id = f"tibber_vehicle_{vehicle_index}_battery"
-        self._attr_name = "Vehicle Battery Level"
+        self._device_id = device_id
+        self._written_available: bool | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only if something this entity shows has changed."""
+        available = self.available
+        changed = self.coordinator.changes.get(self._device_id, frozenset())
+        if available == self._written_available and not changed & self._watched_fields:
+            return
+        self._written_available = available
+        self.async_write_ha_state()
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the availability written when the entity was added."""
+        await super().async_added_to_hass()
+        self._written_available = self.available
 
     @property
-    def native_value(self) -> float | None:
-        """Return the state of the sensor."""
+    def device_state(self) -> DeviceState | None:
+        """Return this device's row of the latest snapshot."""
         if not self.coordinator.data:
             return None
-        return self.coordinator.data.get(ATTR_BATTERY_LEVEL)
+        return self.coordinator.data.devices.get(self._device_id)
 
     @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        return {
-            ATTR_CHARGING: self.coordinator.data.get(ATTR_CHARGING),
-            ATTR_CONNECTED: self.coordinator.data.get(ATTR_CONNECTED),
-        }
-
-class TibberVehicleRangeSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a vehicle range sensor."""
-
-    _attr_device_class = SensorDeviceClass.DISTANCE
-    _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfLength.KILOMETERS
-
-    def __init__(self, coordinator: TibberVehicleDataUpdateCoordinator, vehicle_index: int) -> None:
-        """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._vehicle_index = vehicle_index
-        self._attr_unique_id = f"tibber_vehicle_{vehicle_index}_range"
-        self._attr_name = "Vehicle Range"
+    def available(self) -> bool:
+        """Return if the device is present in the latest snapshot."""
+        return super().available and self.device_state is not None
 
     @property
-    def native_value(self) -> float | None:
-        """Return the state of the sensor."""
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes, shared with the other entities of the device."""
         if not self.coordinator.data:
-            return None
-        return self.coordinator.data.get(ATTR_RANGE)
+            return {}
+        return self.coordinator.data.attributes.get(self._device_id, {})
 
-class TibberVehicleChargePowerSensor(CoordinatorEntity, SensorEntity):
-    """Representation of a vehicle charge power sensor."""
+class TibberVehicleBatterySensor(TibberDeviceEntity, SensorEntity):
+    """Representation of a vehicle battery level sensor."""
 
-    _attr_device_class = SensorDeviceClass.POWER
+    _attr_device_class = SensorDeviceClass.BATTERY
     _attr_state_class = SensorStateClass.MEASUREMENT
-    _attr_native_unit_of_measurement = UnitOfPower.KILO_WATT
+    _attr_native_unit_of_measurement = PERCENTAGE
+    _watched_fields = TibberDeviceEntity._watched_fields | {"battery_level"}
 
-    def __init__(self, coordinator: TibberVehicleDataUpdateCoordinator, vehicle_index: int) -> None:
+    def __init__(self, coordinator: TibberHomeDataUpdateCoordinator, vehicle_id: str) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._vehicle_index = vehicle_index
-        self._attr_unique_id = f"tibber_vehicle_{vehicle_index}_charge_power"
-        self._attr_name = "Vehicle Charge Power"
+        super().__init__(coordinator, vehicle_id)
+        self._attr_unique_id = f"tibber_vehicle_{vehicle_id}_battery"
+        self._attr_name = "Vehicle Battery Level"
 
     @property
     def native_value(self) -> float | None:
         """Return the state of the sensor."""
-        if not self.coordinator.data:
-            return None
-        return self.coordinator.data.get(ATTR_CHARGING_POWER)
+        state = self.device_state
+        return state.battery_level if state else None
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
-        """Return the state attributes."""
-        return {
-            ATTR_CHARGING: self.coordinator.data.get(ATTR_CHARGING),
-            ATTR_CONNECTED: self.coordinator.data.get(ATTR_CONNECTED),
-        } 
\ No newline at end of file
+        """Return the device attributes, flagging a level not yet confirmed by a fetch."""
+        attributes = super().extra_state_attributes
+        if self._device_id in self.coordinator.optimistic:
+            return {**attributes, ATTR_OPTIMISTIC: True}
+        return attributes
@@ -0,0 +1,411 @@
+"""Local stand-in for the Tibber app API with scripted fault injection.
+
+The stand-in answers the login and GraphQL requests the integration
+makes. A script of faults is consumed in request order, so every run of
+the same script sees exactly the same failures:
+
+    sim = StandInTibber([Fault(FAULT_UNAUTHORIZED, count=5)])
+    base_url = await sim.start()
+    api = TibberGraphAPI(session, sim.username, sim.password, base_url=base_url)
+
+Without ``start``, ``InProcessTransport(sim.handle)`` from ``transport``
+serves the client directly, with no sockets involved.
+
+``measure_recovery`` runs a client against a script and reports how long
+it took to get a successful answer and how many requests were wasted.
+Run ``python -m custom_components.tibber_soc_updater.simulator`` for the
+built-in scenarios.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+import json
+import logging
+import re
+import sys
+import time
+from typing import Any, NamedTuple
+from urllib.parse import parse_qs
+
+import aiohttp
+from aiohttp import web
+
+from . import TibberGraphAPI
+from .const import SETTING_BATTERY_LEVEL
+from .operations import GET_VIEWER, Operation
+
+_LOGGER = logging.getLogger(__name__)
+
+FAULT_UNAUTHORIZED = "unauthorized"  # 401 on GraphQL requests
+FAULT_RATE_LIMIT = "rate_limit"  # 429 with a Retry-After header
+FAULT_SLOW = "slow"  # Answer normally after a delay
+FAULT_DROP = "drop"  # Close the connection without answering
+FAULT_HTML = "html"  # 502 with an HTML error page
+
+TARGET_LOGIN = "login"
+TARGET_GQL = "gql"
+
+HTML_ERROR_PAGE = (
+    '<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="utf-8">\n'
+    "<title>Error</title>\n</head>\n<body>\n<pre>Bad Gateway</pre>\n</body>\n</html>\n"
+)
+
+_OPERATION_NAME_RE = re.compile(r"^\s*(?:query|mutation)\s*([_A-Za-z][_0-9A-Za-z]*)")
+
+
+class Fault(NamedTuple):
+    """One scripted fault, applied to the next ``count`` matching requests."""
+
+    kind: str
+    count: int = 1
+    # Only requests to this target are affected, None for every request
+    target: str | None = None
+    delay: float = 0.0
+    retry_after: float = 1.0
+
+
+class SimResponse(NamedTuple):
+    """Response of the stand-in, independent of the HTTP server."""
+
+    status: int
+    body: bytes = b""
+    headers: Mapping[str, str] = {}
+    drop: bool = False
+
+
+@dataclass
+class SimulatorStats:
+    """Counters of what the stand-in has seen."""
+
+    requests: int = 0
+    login_requests: int = 0
+    gql_requests: int = 0
+    tokens_issued: int = 0
+    ok_responses: int = 0
+    faults: Counter = field(default_factory=Counter)
+
+
+def _b64(data: dict[str, Any]) -> str:
+    """Encode a JWT segment."""
+    return base64.b64encode(json.dumps(data).encode()).decode().rstrip("=")
+
+
+def _json_response(status: int, data: Any) -> SimResponse:
+    """Return a JSON response."""
+    return SimResponse(
+        status, json.dumps(data).encode(), {"Content-Type": "application/json"}
+    )
+
+
+class StandInTibber:
+    """Deterministic stand-in for the login and GraphQL endpoints."""
+
+    def __init__(
+        self,
+        script: Sequence[Fault] = (),
+        username: str = "user@example.com",
+        password: str = "secret",
+        home_id: str = "sim-home",
+        vehicle_ids: Sequence[str] = ("sim-vehicle",),
+    ) -> None:
+        """Initialize the stand-in."""
+        self.username = username
+        self.password = password
+        self.home_id = home_id
+        self.battery_levels = {vehicle_id: 50 for vehicle_id in vehicle_ids}
+        self.stats = SimulatorStats()
+        self._script = [[fault, fault.count] for fault in script]
+        self._tokens: set[str] = set()
+        self._runner: web.AppRunner | None = None
+
+    def _next_fault(self, target: str) -> Fault | None:
+        """Consume and return the next scripted fault for a target."""
+        for entry in self._script:
+            fault, remaining = entry
+            # A 401 only means something to GraphQL, logins never consume it
+            applies = fault.target in (None, target) and (
+                fault.kind != FAULT_UNAUTHORIZED or target == TARGET_GQL
+            )
+            if remaining and applies:
+                entry[1] -= 1
+                self.stats.faults[fault.kind] += 1
+                return fault
+            if remaining:
+                # Faults are applied strictly in script order
+                return None
+        return None
+
+    async def handle(
+        self, method: str, path: str, headers: Mapping[str, str], body: bytes
+    ) -> SimResponse:
+        """Answer one request."""
+        self.stats.requests += 1
+        target = TARGET_GQL if path.endswith("/gql") else TARGET_LOGIN
+        if target == TARGET_GQL:
+            self.stats.gql_requests += 1
+        else:
+            self.stats.login_requests += 1
+
+        fault = self._next_fault(target)
+        if fault is not None:
+            if fault.kind == FAULT_SLOW:
+                await asyncio.sleep(fault.delay)
+            elif fault.kind == FAULT_DROP:
+                return SimResponse(0, drop=True)
+            elif fault.kind == FAULT_HTML:
+                return SimResponse(502, HTML_ERROR_PAGE.encode(), {"Content-Type": "text/html"})
+            elif fault.kind == FAULT_RATE_LIMIT:
+                return SimResponse(
+                    429,
+                    b"Too Many Requests",
+                    {"Retry-After": f"{fault.retry_after:g}", "Content-Type": "text/plain"},
+                )
+            elif fault.kind == FAULT_UNAUTHORIZED:
+                return _json_response(401, {"errors": [{"message": "Unauthorized"}]})
+
+        if target == TARGET_LOGIN:
+            response = self._login(method, body)
+        else:
+            response = self._graphql(method, headers, body)
+        if 200 <= response.status < 300:
+            self.stats.ok_responses += 1
+        return response
+
+    def _login(self, method: str, body: bytes) -> SimResponse:
+        """Issue a token for valid credentials, in any of the app's encodings."""
+        if method != "POST":
+            return SimResponse(405, b"Method Not Allowed")
+        text = body.decode(errors="replace")
+        try:
+            credentials = json.loads(text)
+        except ValueError:
+            credentials = {key: values[0] for key, values in parse_qs(text).items()}
+        if not isinstance(credentials, dict) or (
+            credentials.get("email"), credentials.get("password")
+        ) != (self.username, self.password):
+            return SimResponse(400, HTML_ERROR_PAGE.encode(), {"Content-Type": "text/html"})
+
+        self.stats.tokens_issued += 1
+        token = ".".join([
+            _b64({"alg": "none", "typ": "JWT"}),
+            _b64({
+                "sub": self.username,
+                "jti": self.stats.tokens_issued,
+                "scopes": ["gw-api-write", "gw-api-read", "gw-web"],
+            }),
+            "sim",
+        ])
+        self._tokens.add(token)
+        return _json_response(200, {"token": token})
+
+    def _graphql(self, method: str, headers: Mapping[str, str], body: bytes) -> SimResponse:
+        """Answer the GraphQL operations the integration sends."""
+        authorization = headers.get("Authorization", "")
+        if authorization.removeprefix("Bearer ") not in self._tokens:
+            return _json_response(401, {"errors": [{"message": "Unauthorized"}]})
+        try:
+            request = json.loads(body)
+        except ValueError:
+            return _json_response(400, {"errors": [{"message": "Invalid JSON"}]})
+
+        match = _OPERATION_NAME_RE.match(request.get("query") or "")
+        name = match.group(1) if match else None
+        variables = request.get("variables") or {}
+
+        if name == "Typename":
+            return _json_response(200, {"data": {"__typename": "Query"}})
+        if name == "GetViewer":
+            return _json_response(200, {"data": {"me": {"id": "sim-user"}}})
+        if name == "GetHomeSnapshot":
+            return _json_response(200, {"data": {"me": {"homes": [self._home()]}}})
+        if name == "GetPriceInfo":
+            return _json_response(200, {"data": {"me": {"home": self._price_info()}}})
+        if name == "SetVehicleSettings":
+            if variables.get("vehicleId") not in self.battery_levels:
+                return _json_response(200, {"errors": [{"message": "Vehicle not found"}]})
+            settings = variables.get("settings") or []
+            if not isinstance(settings, list):
+                # A single item stands for a list of one, as in the client's check
+                settings = [settings]
+            for item in settings:
+                if item.get("key") == SETTING_BATTERY_LEVEL:
+                    self.battery_levels[variables["vehicleId"]] = item.get("value")
+            return _json_response(200, {
+                "data": {"me": {"setVehicleSettings": {"__typename": "VehicleSettings"}}}
+            })
+        return _json_response(200, {"errors": [{"message": f"Unsupported operation {name}"}]})
+
+    def _home(self) -> dict[str, Any]:
+        """Return the home with its devices as the snapshot query selects it."""
+        return {
+            "id": self.home_id,
+            "electricVehicles": [
+                {
+                    "id": vehicle_id,
+                    "shortName": vehicle_id,
+                    "battery": {"percent": level, "isCharging": False},
+                }
+                for vehicle_id, level in self.battery_levels.items()
+            ],
+        }
+
+    def _price_info(self) -> dict[str, Any]:
+        """Return hourly prices for today and tomorrow with a fixed daily shape."""
+        today = datetime.now().astimezone().replace(hour=0, minute=0, second=0, microsecond=0)
+        days = {}
+        for day_index, day in enumerate(("today", "tomorrow")):
+            start = today + timedelta(days=day_index)
+            days[day] = [
+                {
+                    "startsAt": (start + timedelta(hours=hour)).isoformat(),
+                    "total": round(0.20 + 0.10 * ((hour - 4) % 24) / 23, 4),
+                }
+                for hour in range(24)
+            ]
+        return {"currentSubscription": {"priceInfo": days}}
+
+    async def _web_handler(self, request: web.Request) -> web.StreamResponse:
+        """Adapt an aiohttp request to ``handle``."""
+        response = await self.handle(
+            request.method, request.path, request.headers, await request.read()
+        )
+        if response.drop:
+            # Abort instead of raising, which aiohttp would log with a traceback
+            if request.transport is not None:
+                request.transport.abort()
+            return web.Response(status=499)
+        return web.Response(
+            status=response.status, body=response.body, headers=dict(response.headers)
+        )
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Serve the stand-in over HTTP and return its base URL."""
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._web_handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = self._runner.addresses[0][1]
+        return f"http://{host}:{bound_port}"
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+class RecoveryReport(NamedTuple):
+    """How a client coped with a fault script."""
+
+    scenario: str
+    recovered: bool
+    time_to_recovery: float
+    calls: int
+    requests: int
+    wasted_requests: int
+    logins: int
+
+
+SCENARIOS: dict[str, list[Fault]] = {
+    "baseline": [],
+    "401_storm": [Fault(FAULT_UNAUTHORIZED, count=5, target=TARGET_GQL)],
+    "rate_limited": [Fault(FAULT_RATE_LIMIT, count=3, retry_after=2)],
+    "slow": [Fault(FAULT_SLOW, count=2, delay=3)],
+    "dropped": [Fault(FAULT_DROP, count=3)],
+    "html_errors": [Fault(FAULT_HTML, count=3)],
+    "login_outage": [Fault(FAULT_HTML, count=6, target=TARGET_LOGIN)],
+}
+
+
+async def measure_recovery(
+    scenario: str,
+    script: Sequence[Fault],
+    operation: Operation = GET_VIEWER,
+    variables: dict | None = None,
+    call_timeout: float = 30,
+    budget: float = 120,
+    **api_kwargs: Any,
+) -> RecoveryReport:
+    """Call ``operation`` until it succeeds and report what it cost.
+
+    A fresh client and stand-in are used, so the first call includes the
+    login. Failed calls are retried immediately, like an impatient
+    automation would, until ``budget`` seconds have passed.
+    """
+    sim = StandInTibber(script)
+    base_url = await sim.start()
+    calls = 0
+    recovered = False
+    elapsed = 0.0
+    try:
+        async with aiohttp.ClientSession() as session:
+            api = TibberGraphAPI(
+                session,
+                sim.username,
+                sim.password,
+                base_url=base_url,
+                alternative_login_urls=[],
+                **api_kwargs,
+            )
+            started = time.monotonic()
+            while time.monotonic() - started < budget:
+                calls += 1
+                try:
+                    await api.execute_gql(operation, variables, timeout=call_timeout)
+                except Exception as err:
+                    _LOGGER.debug("Call %d failed: %s", calls, err)
+                    continue
+                recovered = True
+                break
+            elapsed = time.monotonic() - started
+    finally:
+        await sim.stop()
+
+    return RecoveryReport(
+        scenario=scenario,
+        recovered=recovered,
+        time_to_recovery=elapsed,
+        calls=calls,
+        requests=sim.stats.requests,
+        wasted_requests=sim.stats.requests - sim.stats.ok_responses,
+        logins=sim.stats.tokens_issued,
+    )
+
+
+def format_reports(reports: Sequence[RecoveryReport]) -> str:
+    """Render reports as a plain text table."""
+    lines = [
+        f"{'scenario':<14} {'ok':<3} {'recovery_s':>10} {'calls':>5} "
+        f"{'requests':>8} {'wasted':>6} {'logins':>6}"
+    ]
+    for report in reports:
+        lines.append(
+            f"{report.scenario:<14} {'yes' if report.recovered else 'no':<3} "
+            f"{report.time_to_recovery:>10.3f} {report.calls:>5} {report.requests:>8} "
+            f"{report.wasted_requests:>6} {report.logins:>6}"
+        )
+    return "\n".join(lines)
+
+
+async def _main(names: Sequence[str]) -> None:
+    """Run the named scenarios, or all of them, and print the results."""
+    # Failing calls are what the scenarios provoke, only the table matters
+    logging.basicConfig(level=logging.CRITICAL)
+    reports = [
+        await measure_recovery(name, SCENARIOS[name]) for name in names or SCENARIOS
+    ]
+    print(format_reports(reports))
+
+
+if __name__ == "__main__":
+    unknown = [name for name in sys.argv[1:] if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f"Unknown scenarios {unknown}, choose from {sorted(SCENARIOS)}")
+    asyncio.run(_main(sys.argv[1:]))
@@ -0,0 +1,151 @@
+"""Optional per-request tracing for the GraphQL client.
+
+A trace hook is any callable taking the span name, its start and end as
+``time.time_ns()`` values and a mapping of attributes. Without a hook the
+client uses ``NULL_TRACE``, whose spans are a shared no-op context.
+
+The queue and connect spans come from aiohttp's tracing signals, so they
+are only reported for sessions created with ``aiohttp_trace_config()``.
+To export to OpenTelemetry, wrap a tracer with ``opentelemetry_hook``.
+
+Without an explicit hook, enabling debug logging for this module (or the
+whole integration) logs every span through ``log_span``, so tracing can
+be switched on in a running Home Assistant with ``logger.set_level``.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Mapping
+from contextlib import contextmanager, nullcontext
+import logging
+import time
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+SPAN_REQUEST = "graphql.request"  # The whole execute_gql call
+SPAN_TOKEN_WAIT = "graphql.token_wait"  # Login or token refresh before sending
+SPAN_QUEUE = "http.queue"  # Waiting for a free connection in the pool
+SPAN_CONNECT = "http.connect"  # Opening a new connection, DNS and TLS included
+SPAN_FIRST_BYTE = "http.time_to_first_byte"  # Request sent until headers received
+SPAN_BODY_READ = "http.body_read"  # Reading the response body
+SPAN_JSON_DECODE = "graphql.json_decode"  # Decoding the body
+
+TraceHook = Callable[[str, int, int, Mapping[str, Any]], None]
+
+_NULL_SPAN = nullcontext()
+
+
+class NullTrace:
+    """Trace used when tracing is disabled, every span is a shared no-op."""
+
+    __slots__ = ()
+
+    def span(self, name: str) -> nullcontext:
+        """Return the shared no-op context."""
+        return _NULL_SPAN
+
+    def record(self, name: str, start: int, end: int) -> None:
+        """Ignore an already measured span."""
+
+
+NULL_TRACE = NullTrace()
+
+
+class RequestTrace:
+    """Spans of one GraphQL call, reported to a hook as they end."""
+
+    __slots__ = ("_hook", "attributes")
+
+    def __init__(self, hook: TraceHook, attributes: dict[str, Any]) -> None:
+        """Initialize the trace."""
+        self._hook = hook
+        self.attributes = attributes
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Measure the enclosed block as a span."""
+        start = time.time_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.time_ns())
+
+    def record(self, name: str, start: int, end: int) -> None:
+        """Report a span, a failing hook never breaks the request."""
+        try:
+            self._hook(name, start, end, self.attributes)
+        except Exception:  # pylint: disable=broad-except
+            _LOGGER.debug("Trace hook failed for span %s", name, exc_info=True)
+
+
+def log_span(name: str, start: int, end: int, attributes: Mapping[str, Any]) -> None:
+    """Trace hook that logs each span at debug level."""
+    _LOGGER.debug(
+        "%s %s %.2f ms", attributes.get("graphql.operation"), name, (end - start) / 1e6
+    )
+
+
+def default_hook() -> TraceHook | None:
+    """Return the hook used when the client has none, None if tracing is off."""
+    return log_span if _LOGGER.isEnabledFor(logging.DEBUG) else None
+
+
+def _span_start(name: str) -> Callable:
+    """Return an aiohttp signal handler that marks the start of a span."""
+    async def handler(session, context: SimpleNamespace, params) -> None:
+        if isinstance(context.trace_request_ctx, RequestTrace):
+            setattr(context, name, time.time_ns())
+    return handler
+
+
+def _span_end(name: str) -> Callable:
+    """Return an aiohttp signal handler that reports a span."""
+    async def handler(session, context: SimpleNamespace, params) -> None:
+        start = getattr(context, name, None)
+        if start is not None:
+            context.trace_request_ctx.record(name, start, time.time_ns())
+    return handler
+
+
+def aiohttp_trace_config() -> aiohttp.TraceConfig:
+    """Return a trace config that reports connection queueing and setup."""
+    config = aiohttp.TraceConfig()
+    config.on_connection_queued_start.append(_span_start(SPAN_QUEUE))
+    config.on_connection_queued_end.append(_span_end(SPAN_QUEUE))
+    config.on_connection_create_start.append(_span_start(SPAN_CONNECT))
+    config.on_connection_create_end.append(_span_end(SPAN_CONNECT))
+    return config
+
+
+def opentelemetry_hook(tracer: Any) -> TraceHook:
+    """Return a hook that exports spans through an OpenTelemetry tracer.
+
+    Phase spans end before the request span that contains them, so they
+    are held back per request and exported together as children of the
+    request span once it ends.
+    """
+    from opentelemetry import trace  # pylint: disable=import-outside-toplevel
+
+    # id() of a request's attribute dict -> finished phase spans
+    pending: dict[int, list[tuple[str, int, int]]] = {}
+
+    def hook(name: str, start: int, end: int, attributes: Mapping[str, Any]) -> None:
+        if name != SPAN_REQUEST:
+            pending.setdefault(id(attributes), []).append((name, start, end))
+            return
+        children = pending.pop(id(attributes), [])
+        root = tracer.start_span(name, start_time=start, attributes=dict(attributes))
+        context = trace.set_span_in_context(root)
+        for child_name, child_start, child_end in children:
+            child = tracer.start_span(
+                child_name,
+                context=context,
+                start_time=child_start,
+                attributes=dict(attributes),
+            )
+            child.end(end_time=child_end)
+        root.end(end_time=end)
+    return hook
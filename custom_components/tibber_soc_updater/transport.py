@@ -0,0 +1,156 @@
+"""HTTP transports used by the GraphQL client.
+
+A transport sends one request and returns the status, headers and the
+complete body. Headers are passed in as read-only mappings and are never
+changed by the client after a request was started, so concurrent login
+and GraphQL calls cannot see each other's headers.
+
+``AiohttpTransport`` is the default. ``HttpxTransport`` multiplexes all
+calls over one HTTP/2 connection and needs ``httpx[http2]``, which is not
+a requirement of the integration. ``InProcessTransport`` calls a handler
+such as ``StandInTibber.handle`` directly, without sockets.
+"""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any, NamedTuple
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .tracing import NULL_TRACE, SPAN_BODY_READ, SPAN_FIRST_BYTE, NullTrace, RequestTrace
+
+
+class TransportResponse(NamedTuple):
+    """A fully read HTTP response."""
+
+    status: int
+    headers: Mapping[str, str]
+    body: bytes
+
+
+class Transport(ABC):
+    """Send HTTP requests for the client."""
+
+    @abstractmethod
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: bytes | None = None,
+        trace: RequestTrace | NullTrace = NULL_TRACE,
+    ) -> TransportResponse:
+        """Send a request and read the whole response.
+
+        Implementations report the time to first byte and the body read
+        as spans of ``trace``. Timeouts are left to the caller.
+        """
+
+    async def close(self) -> None:
+        """Release resources owned by the transport."""
+
+
+class AiohttpTransport(Transport):
+    """Transport on a shared aiohttp session, which the caller owns."""
+
+    def __init__(self, session: aiohttp.ClientSession) -> None:
+        """Initialize the transport."""
+        self._session = session
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: bytes | None = None,
+        trace: RequestTrace | NullTrace = NULL_TRACE,
+    ) -> TransportResponse:
+        """Send a request through the session."""
+        with trace.span(SPAN_FIRST_BYTE):
+            response = await self._session.request(
+                method,
+                url,
+                data=body,
+                headers=headers,
+                trace_request_ctx=None if trace is NULL_TRACE else trace,
+            )
+        async with response:
+            with trace.span(SPAN_BODY_READ):
+                data = await response.read()
+            return TransportResponse(response.status, response.headers, data)
+
+
+class HttpxTransport(Transport):
+    """Transport multiplexing concurrent requests over one HTTP/2 connection."""
+
+    def __init__(self, client: Any = None) -> None:
+        """Initialize the transport.
+
+        Without a ``client`` an HTTP/2 enabled ``httpx.AsyncClient`` is
+        created, which ``close`` shuts down again.
+        """
+        self._owns_client = client is None
+        if client is None:
+            try:
+                import httpx  # pylint: disable=import-outside-toplevel
+
+                client = httpx.AsyncClient(http2=True)
+            except ImportError as err:
+                raise RuntimeError("The HTTP/2 transport needs httpx[http2] installed") from err
+        self._client = client
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: bytes | None = None,
+        trace: RequestTrace | NullTrace = NULL_TRACE,
+    ) -> TransportResponse:
+        """Send a request over the shared connection."""
+        request = self._client.build_request(method, url, headers=dict(headers), content=body)
+        with trace.span(SPAN_FIRST_BYTE):
+            response = await self._client.send(request, stream=True)
+        try:
+            with trace.span(SPAN_BODY_READ):
+                data = await response.aread()
+        finally:
+            await response.aclose()
+        return TransportResponse(response.status_code, response.headers, data)
+
+    async def close(self) -> None:
+        """Close the client if this transport created it."""
+        if self._owns_client:
+            await self._client.aclose()
+
+
+class InProcessTransport(Transport):
+    """Transport calling a request handler in the same process.
+
+    The handler takes the method, path, headers and body and returns an
+    object with ``status``, ``headers`` and ``body``; a true ``drop``
+    attribute simulates a closed connection.
+    """
+
+    def __init__(self, handler: Callable[[str, str, Mapping[str, str], bytes], Awaitable[Any]]) -> None:
+        """Initialize the transport."""
+        self._handler = handler
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str],
+        body: bytes | None = None,
+        trace: RequestTrace | NullTrace = NULL_TRACE,
+    ) -> TransportResponse:
+        """Hand the request to the handler."""
+        parts = urlsplit(url)
+        path = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        with trace.span(SPAN_FIRST_BYTE):
+            response = await self._handler(method, path, headers, body or b"")
+        if getattr(response, "drop", False):
+            raise ConnectionResetError("Connection dropped by handler")
+        return TransportResponse(response.status, response.headers, response.body)
@@ -0,0 +1,116 @@
+"""Background queue for SoC writes."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+import time
+from typing import TYPE_CHECKING, Any
+
+from .operations import SET_VEHICLE_SETTINGS, vehicle_soc_variables
+
+if TYPE_CHECKING:
+    from . import TibberGraphAPI
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SocWriteQueue:
+    """Send SoC writes one at a time from a background task.
+
+    Writes for a vehicle that is still waiting are replaced by the newer
+    value, so a burst of updates results in a single request carrying the
+    last level.
+    """
+
+    def __init__(
+        self,
+        api: TibberGraphAPI,
+        on_written: Callable[[str, str, Any], None] | None = None,
+    ) -> None:
+        """Initialize the queue.
+
+        ``on_written`` is called with the home ID, vehicle ID and level
+        sent after Tibber acknowledged a write.
+        """
+        self._api = api
+        self._on_written = on_written
+        # (home_id, vehicle_id) -> (battery_level, timeout), in arrival order
+        self._pending: dict[tuple[str, str], tuple[Any, float | None]] = {}
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopped = False
+
+    @property
+    def pending(self) -> int:
+        """Return the number of writes waiting to be sent."""
+        return len(self._pending)
+
+    def submit(
+        self, vehicle_id: str, home_id: str, battery_level: Any, timeout: float | None = None
+    ) -> None:
+        """Queue a write and return immediately.
+
+        The variables are validated here, so invalid input raises right
+        away instead of failing later in the background. After
+        ``async_stop`` nothing would send the write, so it raises
+        ``RuntimeError``.
+        """
+        if self._stopped:
+            raise RuntimeError("The SoC write queue has been stopped")
+        variables = vehicle_soc_variables(vehicle_id, home_id, battery_level)
+        SET_VEHICLE_SETTINGS.validate(variables)
+
+        key = (home_id, vehicle_id)
+        if key in self._pending:
+            _LOGGER.debug("Replacing queued SoC write for vehicle %s", vehicle_id)
+        self._pending[key] = (battery_level, timeout)
+        self._wakeup.set()
+
+    def start(self, create_task) -> None:
+        """Start the worker using the given task factory."""
+        self._task = create_task(self._run())
+
+    async def async_stop(self) -> None:
+        """Stop the worker, dropping writes that were not sent yet."""
+        self._stopped = True
+        if self._pending:
+            _LOGGER.warning("Dropping %s queued SoC writes on unload", len(self._pending))
+            self._pending.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Send queued writes until cancelled."""
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self._pending:
+                (home_id, vehicle_id), (battery_level, timeout) = next(iter(self._pending.items()))
+                del self._pending[(home_id, vehicle_id)]
+                await self._send(vehicle_id, home_id, battery_level, timeout)
+
+    async def _send(
+        self, vehicle_id: str, home_id: str, battery_level: Any, timeout: float | None
+    ) -> None:
+        """Send one write and log the outcome."""
+        started = time.monotonic()
+        variables = vehicle_soc_variables(vehicle_id, home_id, battery_level)
+        try:
+            await self._api.execute_gql(SET_VEHICLE_SETTINGS, variables, timeout=timeout)
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.error("Failed to set vehicle %s SoC in background: %s", vehicle_id, err)
+            return
+        _LOGGER.info(
+            "Successfully set vehicle %s SoC to %s%% in %.0f ms",
+            vehicle_id,
+            battery_level,
+            (time.monotonic() - started) * 1000,
+        )
+        if self._on_written is not None:
+            self._on_written(home_id, vehicle_id, variables["settings"][0]["value"])
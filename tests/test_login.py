@@ -0,0 +1,54 @@
+"""Tests for logging in through the stand-in server."""
+import asyncio
+import time
+
+from custom_components.tibber_soc_updater import TibberGraphAPI
+from custom_components.tibber_soc_updater.operations import GET_VIEWER
+from custom_components.tibber_soc_updater.simulator import (
+    FAULT_SLOW,
+    TARGET_LOGIN,
+    Fault,
+    StandInTibber,
+)
+from custom_components.tibber_soc_updater.transport import InProcessTransport
+
+
+def make_api(sim: StandInTibber, **kwargs) -> TibberGraphAPI:
+    """Return a client served by the stand-in without sockets."""
+    return TibberGraphAPI(
+        None,
+        sim.username,
+        sim.password,
+        alternative_login_urls=[],
+        transport=InProcessTransport(sim.handle),
+        **kwargs,
+    )
+
+
+def test_concurrent_calls_share_one_login():
+    """Calls that all find no token wait for a single login."""
+    sim = StandInTibber()
+    api = make_api(sim)
+
+    async def run():
+        return await asyncio.gather(*(api.execute_gql(GET_VIEWER, timeout=10) for _ in range(10)))
+
+    results = asyncio.run(run())
+    assert all(result == {"me": {"id": "sim-user"}} for result in results)
+    assert sim.stats.tokens_issued == 1
+    assert sim.stats.login_requests == 1
+
+
+def test_hanging_login_is_hedged():
+    """A login that hangs is overtaken once the first hedge delay passes."""
+    sim = StandInTibber([Fault(FAULT_SLOW, count=1, delay=10, target=TARGET_LOGIN)])
+    api = make_api(sim, first_hedge_delay=0.2, hedge_delay=0.1)
+
+    async def run():
+        started = time.monotonic()
+        await api.authenticate(timeout=10)
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+    assert 0.2 <= elapsed < 2
+    assert sim.stats.tokens_issued == 1
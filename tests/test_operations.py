@@ -0,0 +1,125 @@
+"""Tests for the GraphQL operation registry."""
+import pytest
+
+from custom_components.tibber_soc_updater.const import SETTING_BATTERY_LEVEL
+from custom_components.tibber_soc_updater.operations import (
+    OPERATIONS,
+    SET_VEHICLE_SETTINGS,
+    OperationValidationError,
+    _tokenize,
+    minify,
+    register,
+    vehicle_soc_variables,
+)
+
+
+@pytest.fixture
+def scratch_register():
+    """Register operations for one test and remove them afterwards."""
+    names = []
+
+    def _register(document, check=None):
+        operation = register(document, check)
+        names.append(operation.name)
+        return operation
+
+    yield _register
+    for name in names:
+        OPERATIONS.pop(name, None)
+
+
+def test_minify_drops_comments_and_whitespace():
+    """Only the separators between words survive."""
+    document = """
+    # leading comment
+    query Test($id: ID!, $first: Int = 10) {
+        node(id: $id) { ... on Vehicle { id } }  # trailing
+    }
+    """
+    assert minify(document) == "query Test($id:ID!$first:Int=10){node(id:$id){...on Vehicle{id}}}"
+
+
+def test_minify_keeps_strings_intact():
+    """Whitespace, commas and hashes inside strings are not touched."""
+    document = 'query { a(s: "x,  # y", b: """ block "quoted" """) }'
+    assert minify(document) == 'query{a(s:"x,  # y"b:""" block "quoted" """)}'
+
+
+def test_tokenize_rejects_unknown_characters():
+    """Characters outside the GraphQL grammar are reported."""
+    with pytest.raises(ValueError, match="Unexpected character"):
+        _tokenize("query { a % b }")
+
+
+def test_register_parses_variables(scratch_register):
+    """Names, types and defaults come from the document."""
+    operation = scratch_register(
+        "query ScratchVars($id: ID!, $ids: [String!]!, $first: Int = 5) { a }"
+    )
+    assert operation.name == "ScratchVars"
+    assert {name: str(type_ref) for name, type_ref in operation.variables.items()} == {
+        "id": "ID!",
+        "ids": "[String!]!",
+        "first": "Int",
+    }
+    assert operation.defaults == frozenset({"first"})
+    with pytest.raises(ValueError, match="Duplicate"):
+        register("query ScratchVars { a }")
+
+
+@pytest.mark.parametrize(
+    ("variables", "message"),
+    [
+        ({}, "missing required variable \\$id"),
+        ({"id": "1", "other": 1}, "unknown variables"),
+        ({"id": None}, "must not be null"),
+        ({"id": True}, "must be an ID"),
+        ({"id": "1", "count": 2**31}, "must be an Int"),
+        ({"id": "1", "count": True}, "must be an Int"),
+        ({"id": "1", "names": ["a", None]}, "names\\[1\\] must not be null"),
+        ({"id": "1", "ratio": "0.5"}, "must be a Float"),
+    ],
+)
+def test_validate_rejects(scratch_register, variables, message):
+    """Variables that do not fit the declared types raise locally."""
+    operation = scratch_register(
+        "query ScratchTypes($id: ID!, $count: Int, $names: [String!], $ratio: Float) { a }"
+    )
+    with pytest.raises(OperationValidationError, match=message):
+        operation.validate(variables)
+
+
+def test_validate_accepts(scratch_register):
+    """Valid variables, defaults and single items for lists pass."""
+    operation = scratch_register(
+        "query ScratchOk($id: ID!, $names: [String!], $ratio: Float = 1) { a }"
+    )
+    operation.validate({"id": 7, "names": "single", "ratio": 2})
+    operation.validate({"id": "7"})
+
+
+def test_vehicle_soc_variables_are_valid():
+    """Levels in range are sent as integers."""
+    variables = vehicle_soc_variables("vehicle", "home", 80.7)
+    SET_VEHICLE_SETTINGS.validate(variables)
+    assert variables["settings"] == [{"key": SETTING_BATTERY_LEVEL, "value": 80}]
+
+
+@pytest.mark.parametrize("level", [-1, 101, 150.0, True, "80", None])
+def test_vehicle_soc_rejects_bad_levels(level):
+    """Out of range and non-numeric levels fail validation."""
+    with pytest.raises(OperationValidationError):
+        SET_VEHICLE_SETTINGS.validate(vehicle_soc_variables("vehicle", "home", level))
+
+
+def test_single_settings_item_is_checked():
+    """A lone settings object is range-checked like a list of one."""
+    variables = {
+        "vehicleId": "vehicle",
+        "homeId": "home",
+        "settings": {"key": SETTING_BATTERY_LEVEL, "value": 150},
+    }
+    with pytest.raises(OperationValidationError, match="Invalid battery level"):
+        SET_VEHICLE_SETTINGS.validate(variables)
+    variables["settings"]["value"] = 50
+    SET_VEHICLE_SETTINGS.validate(variables)
@@ -0,0 +1,139 @@
+"""Tests for the cheapest-window index of the price curve."""
+from datetime import datetime, timedelta, timezone
+import random
+
+import pytest
+
+from custom_components.tibber_soc_updater.prices import PriceCurve, parse_price_info
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+HOUR = timedelta(hours=1)
+
+
+def make_curve(prices: list[float]) -> PriceCurve:
+    """Return an hourly curve starting at START."""
+    return PriceCurve([(START + i * HOUR, price) for i, price in enumerate(prices)], START)
+
+
+def brute_force(prices, length, first, last):
+    """Return the total of the cheapest window starting in [first, last]."""
+    return min(sum(prices[i:i + length]) for i in range(first, last + 1))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_brute_force(seed):
+    """Every window length and range agrees with a linear scan."""
+    rng = random.Random(seed)
+    prices = [round(rng.uniform(0.1, 0.5), 3) for _ in range(rng.randint(1, 48))]
+    curve = make_curve(prices)
+    for length in range(1, len(prices) + 1):
+        for _ in range(5):
+            first = rng.randint(0, len(prices) - length)
+            last = rng.randint(first, len(prices) - length)
+            window = curve.cheapest_window(
+                length * HOUR,
+                after=START + first * HOUR,
+                before=START + (last + length) * HOUR,
+            )
+            total = brute_force(prices, length, first, last)
+            # Equal sums may differ in rounding, so check the chosen window
+            # instead of expecting a particular start among ties
+            start = (window.start - START) // HOUR
+            assert first <= start <= last
+            assert sum(prices[start:start + length]) == pytest.approx(total)
+            assert window.total == pytest.approx(total)
+            assert window.end == window.start + length * HOUR
+            assert window.average == pytest.approx(total / length)
+
+
+def test_partial_hours_round_up():
+    """A duration that is not a whole number of slots takes the next slot too."""
+    curve = make_curve([5, 1, 1, 5])
+    window = curve.cheapest_window(timedelta(minutes=90))
+    assert (window.start, window.end) == (START + HOUR, START + 3 * HOUR)
+
+
+def test_window_does_not_start_in_the_past():
+    """A query in the middle of a slot starts at the next boundary."""
+    curve = make_curve([1, 5, 5, 5])
+    window = curve.cheapest_window(HOUR, after=START + timedelta(minutes=50))
+    assert window.start == START + HOUR
+
+
+def test_after_end_of_curve():
+    """Nothing is returned once the last slot is over."""
+    curve = make_curve([1] * 24)
+    assert curve.cheapest_window(HOUR, after=START + 24 * HOUR) is None
+    assert curve.cheapest_window(HOUR, after=START + 30 * HOUR) is None
+
+
+def test_window_too_long():
+    """Windows longer than the remaining prices do not fit."""
+    curve = make_curve([1, 2, 3])
+    assert curve.cheapest_window(4 * HOUR) is None
+    assert curve.cheapest_window(2 * HOUR, before=START + HOUR) is None
+
+
+def test_missing_price_splits_the_curve():
+    """No window spans a slot whose price is missing."""
+    hours = [0.1, 0.1, None, 0.1, 0.5, 0.5]
+    curve = parse_price_info(
+        {
+            "today": [
+                {"startsAt": (START + i * HOUR).isoformat(), "total": price}
+                for i, price in enumerate(hours)
+            ],
+        },
+        START,
+    )
+    assert curve.slot_length == HOUR
+    window = curve.cheapest_window(2 * HOUR)
+    assert (window.start, window.end) == (START, START + 2 * HOUR)
+    window = curve.cheapest_window(3 * HOUR)
+    assert (window.start, window.end) == (START + 3 * HOUR, START + 6 * HOUR)
+    assert window.total == pytest.approx(1.1)
+    assert curve.cheapest_window(4 * HOUR) is None
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_gaps_match_brute_force(seed):
+    """Windows with gaps agree with a scan over the gap-free runs."""
+    rng = random.Random(seed)
+    prices = [
+        None if rng.random() < 0.15 else round(rng.uniform(0.1, 0.5), 3)
+        for _ in range(rng.randint(2, 48))
+    ]
+    slots = [(START + i * HOUR, price) for i, price in enumerate(prices) if price is not None]
+    if len(slots) < 2:
+        return
+    curve = PriceCurve(slots, START)
+    for length in range(1, len(prices) + 1):
+        totals = [
+            sum(prices[i:i + length])
+            for i in range(len(prices) - length + 1)
+            if None not in prices[i:i + length]
+        ]
+        window = curve.cheapest_window(length * HOUR)
+        if not totals:
+            assert window is None
+            continue
+        start = (window.start - START) // HOUR
+        assert None not in prices[start:start + length]
+        assert window.end == window.start + length * HOUR
+        assert window.total == pytest.approx(min(totals))
+
+
+def test_parse_price_info():
+    """Today and tomorrow are joined and missing totals are skipped."""
+    curve = parse_price_info(
+        {
+            "today": [{"startsAt": START.isoformat(), "total": 0.2}],
+            "tomorrow": [
+                {"startsAt": (START + HOUR).isoformat(), "total": 0.1},
+                {"startsAt": (START + 2 * HOUR).isoformat(), "total": None},
+            ],
+        },
+        START,
+    )
+    assert curve.prices == [0.2, 0.1]
+    assert curve.end == START + 2 * HOUR
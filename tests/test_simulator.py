@@ -0,0 +1,33 @@
+"""Tests for the stand-in Tibber server."""
+import asyncio
+
+import pytest
+
+from custom_components.tibber_soc_updater import TibberGraphAPI
+from custom_components.tibber_soc_updater.const import SETTING_BATTERY_LEVEL
+from custom_components.tibber_soc_updater.operations import SET_VEHICLE_SETTINGS
+from custom_components.tibber_soc_updater.simulator import StandInTibber
+from custom_components.tibber_soc_updater.transport import InProcessTransport
+
+
+@pytest.mark.parametrize(
+    "settings",
+    [
+        {"key": SETTING_BATTERY_LEVEL, "value": 77},
+        [{"key": SETTING_BATTERY_LEVEL, "value": 77}],
+    ],
+)
+def test_set_vehicle_settings(settings):
+    """A single settings object is applied like a list of one."""
+    sim = StandInTibber()
+    api = TibberGraphAPI(
+        None,
+        sim.username,
+        sim.password,
+        alternative_login_urls=[],
+        transport=InProcessTransport(sim.handle),
+    )
+    variables = {"vehicleId": "sim-vehicle", "homeId": sim.home_id, "settings": settings}
+
+    asyncio.run(api.execute_gql(SET_VEHICLE_SETTINGS, variables, timeout=10))
+    assert sim.battery_levels == {"sim-vehicle": 77}
@@ -0,0 +1,50 @@
+"""Tests for the background SoC write queue."""
+import asyncio
+
+import pytest
+
+from custom_components.tibber_soc_updater.writer import SocWriteQueue
+
+
+class RecordingApi:
+    """Client stand-in that records the variables of every write."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def execute_gql(self, query, variables=None, timeout=None):
+        self.sent.append(variables)
+        return {}
+
+
+def test_burst_is_sent_once_with_last_level():
+    """Queued writes for a vehicle collapse into the newest level."""
+    api = RecordingApi()
+    written = []
+
+    async def run():
+        queue = SocWriteQueue(api, on_written=lambda *args: written.append(args))
+        for level in (40, 50, 60):
+            queue.submit("vehicle", "home", level)
+        queue.start(asyncio.create_task)
+        while queue.pending or not written:
+            await asyncio.sleep(0)
+        await queue.async_stop()
+
+    asyncio.run(run())
+    assert [variables["settings"][0]["value"] for variables in api.sent] == [60]
+    assert written == [("home", "vehicle", 60)]
+
+
+def test_submit_after_stop_raises():
+    """A stopped queue refuses writes instead of keeping them forever."""
+    queue = SocWriteQueue(RecordingApi())
+
+    async def run():
+        queue.start(asyncio.create_task)
+        await queue.async_stop()
+
+    asyncio.run(run())
+    with pytest.raises(RuntimeError):
+        queue.submit("vehicle", "home", 50)
+    assert queue.pending == 0